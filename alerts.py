@@ -0,0 +1,50 @@
+import os
+import re
+import threading
+import time
+
+ERROR_SUPPRESSION_WINDOW = int(os.getenv('ERROR_SUPPRESSION_WINDOW', 6 * 3600))
+PROGRAM_RECOVERED = 'Работа программы восстановлена'
+
+NUMBERS = re.compile(r'\d+')
+
+
+def error_fingerprint(error):
+    """Отпечаток ошибки: тип и сообщение без меняющихся чисел."""
+    return type(error).__name__, NUMBERS.sub('#', str(error))
+
+
+class ErrorNotifier:
+    """Решает, сообщать ли в чат о сбое.
+
+    О сбое с тем же отпечатком повторно сообщается не чаще раза
+    в window секунд; новый отпечаток — новый инцидент. После первого
+    успешного цикла recovered() один раз разрешает сообщить
+    о восстановлении.
+    """
+
+    def __init__(self, window=ERROR_SUPPRESSION_WINDOW):
+        """Создаёт уведомитель без открытых инцидентов."""
+        self.window = window
+        self._incidents = {}
+        self._lock = threading.Lock()
+
+    def should_notify(self, key, error):
+        """Нужно ли сообщать о сбое error для ключа key."""
+        fingerprint = error_fingerprint(error)
+        now = time.time()
+        with self._lock:
+            incident = self._incidents.get(key)
+            if (
+                incident is not None
+                and incident[0] == fingerprint
+                and now - incident[1] < self.window
+            ):
+                return False
+            self._incidents[key] = (fingerprint, now)
+            return True
+
+    def recovered(self, key):
+        """Закрывает инцидент ключа; True, если он был открыт."""
+        with self._lock:
+            return self._incidents.pop(key, None) is not None
@@ -0,0 +1,125 @@
+import os
+import time
+from collections import namedtuple
+from functools import partial
+from http import HTTPStatus
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from homework import (ENDPOINT, make_headers, parse_api_response,
+                      send_api_request)
+from metrics import API_LATENCY, PARSE_LATENCY
+from resilience import (RETRY_ATTEMPTS, RETRY_MAX_DELAY, RETRY_STATUSES,
+                        CircuitBreaker, backoff_delay, retry_after)
+from response_cache import ResponseCache
+from schema import loads
+
+HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', 100))
+CONNECT_TIMEOUT = float(os.getenv('CONNECT_TIMEOUT', 5))
+READ_TIMEOUT = float(os.getenv('READ_TIMEOUT', 30))
+
+CONNECTION_STATS = ('Запросов: {requests}, соединений: {connections}, '
+                    'переиспользование: {reuse_rate:.1%}')
+
+ConnectionStats = namedtuple(
+    'ConnectionStats',
+    ('requests', 'connections', 'reuse_rate')
+)
+
+_session = None
+response_cache = ResponseCache()
+circuit_breaker = CircuitBreaker()
+
+
+def create_session(pool_size=HTTP_POOL_SIZE):
+    """Сессия с пулом keep-alive соединений к API Практикума."""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=pool_size,
+        pool_block=True
+    )
+    session.mount(ENDPOINT, adapter)
+    return session
+
+
+def get_session():
+    """Общая для всех опросов сессия, создаётся при первом обращении."""
+    global _session
+    if _session is None:
+        _session = create_session()
+    return _session
+
+
+def request_with_retries(headers, timestamp):
+    """Запрос к API с повторами и общим размыкателем.
+
+    Сетевые сбои и ответы 429/502/503/504 повторяются с экспоненциальной
+    паузой, Retry-After имеет приоритет. Если API просит подождать
+    дольше RETRY_MAX_DELAY, размыкатель останавливает запросы всех
+    токенов на это время.
+    """
+    http_get = partial(
+        get_session().get,
+        timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)
+    )
+    for attempt in range(RETRY_ATTEMPTS):
+        last_attempt = attempt + 1 == RETRY_ATTEMPTS
+        circuit_breaker.before_call()
+        try:
+            response = send_api_request(http_get, headers, timestamp)
+        except ConnectionError:
+            circuit_breaker.record_failure()
+            if last_attempt:
+                raise
+            time.sleep(backoff_delay(attempt))
+            continue
+        if response.status_code >= HTTPStatus.INTERNAL_SERVER_ERROR:
+            circuit_breaker.record_failure()
+        else:
+            circuit_breaker.record_success()
+        if response.status_code not in RETRY_STATUSES or last_attempt:
+            return response
+        delay = retry_after(response)
+        if delay is not None and delay > RETRY_MAX_DELAY:
+            circuit_breaker.open_for(delay)
+            return response
+        time.sleep(delay if delay is not None else backoff_delay(attempt))
+
+
+def fetch_homework_statuses(token, timestamp):
+    """Запрос статусов работ токена через общую сессию.
+
+    Возвращает NotChanged с current_date, если ответ не изменился
+    с прошлого запроса токена.
+    """
+    headers = make_headers(token)
+    headers.update(response_cache.conditional_headers(token))
+    with API_LATENCY.time():
+        response = request_with_retries(headers, timestamp)
+    not_changed = response_cache.check(token, response)
+    if not_changed is not None:
+        return not_changed
+    with PARSE_LATENCY.time():
+        return parse_api_response(response, loads)
+
+
+def forget_response(token):
+    """Забывает закешированный ответ токена: следующий будет разобран."""
+    response_cache.discard(token)
+
+
+def connection_stats(session=None):
+    """Счётчики запросов и новых соединений в пулах сессии."""
+    session = session or get_session()
+    requests_count = connections = 0
+    for adapter in session.adapters.values():
+        pools = adapter.poolmanager.pools
+        for key in pools.keys():
+            requests_count += pools[key].num_requests
+            connections += pools[key].num_connections
+    reuse_rate = (
+        1 - connections / requests_count if requests_count else 0.0
+    )
+    return ConnectionStats(requests_count, connections, reuse_rate)
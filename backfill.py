@@ -0,0 +1,177 @@
+"""Загрузка полной истории статусов работ для списка токенов.
+
+Токены читаются из файла по одному на строку (лишние столбцы, например
+chat_id из файла подписок, игнорируются). Для каждого токена выполняется
+запрос с from_date=0; работы записываются в таблицу homeworks базы
+состояния, их статусы считаются уже отправленными, а курсор переносится
+вперёд на current_date, чтобы опросчик не присылал всю историю. База
+в памяти не принимается: загруженное пропало бы при выходе. Запуск:
+
+    python backfill.py tokens.txt --db state.sqlite3 --concurrency 50
+"""
+from dotenv import load_dotenv
+
+if __name__ == '__main__':
+    # Настройки модулей читаются при импорте, поэтому .env — до них.
+    load_dotenv()
+
+import argparse
+import logging
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from api_client import request_with_retries
+from cursors import advance_cursor
+from homework import (check_response, homework_key, make_headers,
+                      parse_api_response, remember_statuses,
+                      validate_homework)
+from schema import loads
+from storage import IN_MEMORY, STATE_DB, StateStore
+
+BACKFILL_CONCURRENCY = int(os.getenv('BACKFILL_CONCURRENCY', 50))
+COMMIT_EVERY = 100
+
+BACKFILL_PROGRESS = ('Загружено токенов: {tokens} из {total}, работ: '
+                     '{homeworks}, ошибок: {errors}')
+BACKFILL_RESULT = ('Токенов: {tokens}, работ: {homeworks}, ошибок: {errors} '
+                   'за {elapsed:.1f} с ({tokens_rate:.1f} токенов/с, '
+                   '{homeworks_rate:.0f} работ/с)')
+BACKFILL_FAILED = 'История токена не загружена: {error}'
+BAD_HOMEWORK = 'Работа пропущена: {error}'
+DB_IN_MEMORY = ('база в памяти пропадёт после загрузки: укажите файл '
+                'через --db или STATE_DB')
+
+
+def read_tokens(path):
+    """Токены из первого столбца файла без пустых строк и комментариев."""
+    with open(path, encoding='utf-8') as file:
+        return [
+            line.split()[0] for line in file
+            if line.strip() and not line.lstrip().startswith('#')
+        ]
+
+
+def fetch_history(token):
+    """Полная история работ токена: ответ API с from_date=0."""
+    return parse_api_response(
+        request_with_retries(make_headers(token), 0), loads
+    )
+
+
+def iter_histories(tokens, concurrency):
+    """Пары (токен, ответ или исключение) по мере готовности.
+
+    В работе одновременно не больше 2 * concurrency запросов, поэтому
+    память не растёт с длиной списка токенов.
+    """
+    pending = {}
+    tokens = iter(tokens)
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        while True:
+            for token in tokens:
+                pending[executor.submit(fetch_history, token)] = token
+                if len(pending) >= 2 * concurrency:
+                    break
+            if not pending:
+                return
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                token = pending.pop(future)
+                try:
+                    yield token, future.result()
+                except Exception as error:
+                    yield token, error
+
+
+def normalize(homeworks):
+    """Строки таблицы homeworks и работы, прошедшие проверку."""
+    rows = []
+    valid = []
+    for homework in homeworks:
+        try:
+            name, status = validate_homework(homework)
+        except (KeyError, TypeError, ValueError) as error:
+            logging.warning(BAD_HOMEWORK.format(error=error))
+            continue
+        valid.append(homework)
+        rows.append((
+            homework_key(homework),
+            name,
+            status,
+            homework.get('lesson_name'),
+            homework.get('reviewer_comment'),
+            homework.get('date_updated'),
+        ))
+    return rows, valid
+
+
+def backfill(tokens, store, concurrency=BACKFILL_CONCURRENCY):
+    """Загружает историю токенов в store и возвращает сводку."""
+    started = time.perf_counter()
+    loaded = homeworks_count = errors = 0
+    for token, response in iter_histories(tokens, concurrency):
+        try:
+            if isinstance(response, Exception):
+                raise response
+            rows, valid = normalize(check_response(response))
+        except Exception as error:
+            errors += 1
+            logging.error(BACKFILL_FAILED.format(error=error))
+            continue
+        store.save_homeworks(token, rows)
+        remember_statuses(store, token, valid)
+        # Курсор, уже ушедший дальше истории, назад не переносится.
+        store.save_cursor(token, advance_cursor(
+            store.load_cursor(token), response.get('current_date')
+        ))
+        loaded += 1
+        homeworks_count += len(rows)
+        if loaded % COMMIT_EVERY == 0:
+            store.commit()
+            logging.info(BACKFILL_PROGRESS.format(
+                tokens=loaded, total=len(tokens),
+                homeworks=homeworks_count, errors=errors
+            ))
+    store.commit()
+    elapsed = time.perf_counter() - started
+    return dict(
+        tokens=loaded,
+        homeworks=homeworks_count,
+        errors=errors,
+        elapsed=elapsed,
+        tokens_rate=loaded / elapsed if elapsed else 0,
+        homeworks_rate=homeworks_count / elapsed if elapsed else 0,
+    )
+
+
+def main():
+    """Разбор аргументов, загрузка и печать сводки."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument('tokens', help='файл с токенами')
+    parser.add_argument('--db', default=STATE_DB, help='база состояния')
+    parser.add_argument(
+        '--concurrency', type=int, default=BACKFILL_CONCURRENCY
+    )
+    args = parser.parse_args()
+    if args.db == IN_MEMORY:
+        parser.error(DB_IN_MEMORY)
+    store = StateStore(args.db)
+    try:
+        result = backfill(read_tokens(args.tokens), store, args.concurrency)
+    finally:
+        store.close()
+    print(BACKFILL_RESULT.format(**result))
+    if result['errors']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s, %(levelname)s, %(message)s, %(name)s'
+    )
+    main()
@@ -0,0 +1 @@
+"""Бенчмарки опроса и уведомлений."""
@@ -0,0 +1,102 @@
+"""Локальные HTTP-заглушки API Практикума и Bot API Telegram."""
+import json
+import threading
+import zlib
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from records import Status
+
+STATUSES = [status.value for status in Status]
+
+
+def make_homeworks(count, seed=0):
+    """Список из count работ в формате API."""
+    return [
+        {
+            'id': seed * count + number,
+            'homework_name': f'user__hw{number}.zip',
+            'status': STATUSES[(seed + number) % len(STATUSES)],
+            'reviewer_comment': 'Замечаний нет.',
+            'date_updated': '2020-02-13T14:40:57Z',
+            'lesson_name': 'Итоговый проект',
+        }
+        for number in range(count)
+    ]
+
+
+class JsonHandler(BaseHTTPRequestHandler):
+    """Общая часть заглушек: ответ JSON и тихий журнал."""
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def reply(self, data, status=HTTPStatus.OK):
+        """Отвечает телом data в JSON."""
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        """Журнал запросов заглушкам не нужен."""
+
+
+class PracticumHandler(JsonHandler):
+    """GET homework_statuses: homeworks работ на каждый токен."""
+
+    def do_GET(self):
+        """Отдаёт работы токена из заголовка Authorization."""
+        token = self.headers.get('Authorization', '').partition('OAuth ')[2]
+        if not token:
+            return self.reply({}, HTTPStatus.UNAUTHORIZED)
+        return self.reply({
+            'homeworks': make_homeworks(
+                self.server.homeworks, seed=zlib.crc32(token.encode()) % 1000
+            ),
+            'current_date': 1581604970,
+        })
+
+
+class TelegramHandler(JsonHandler):
+    """POST /bot<токен>/sendMessage: подтверждает отправку."""
+
+    def do_POST(self):
+        """Возвращает сообщение, как его вернул бы Telegram."""
+        length = int(self.headers.get('Content-Length') or 0)
+        data = json.loads(self.rfile.read(length) or b'{}')
+        if not self.path.endswith('/sendMessage'):
+            return self.reply({'ok': False}, HTTPStatus.NOT_FOUND)
+        return self.reply({'ok': True, 'result': {
+            'message_id': 1,
+            'date': 0,
+            'chat': {'id': int(data.get('chat_id', 0)), 'type': 'private'},
+            'text': data.get('text', ''),
+        }})
+
+
+def start_server(handler, **attributes):
+    """Запускает заглушку на свободном порту в фоновом потоке."""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    server.daemon_threads = True
+    for name, value in attributes.items():
+        setattr(server, name, value)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def start_practicum(homeworks):
+    """Заглушка API Практикума; возвращает сервер и адрес эндпоинта."""
+    server = start_server(PracticumHandler, homeworks=homeworks)
+    return server, (
+        f'http://127.0.0.1:{server.server_port}'
+        '/api/user_api/homework_statuses/'
+    )
+
+
+def start_telegram():
+    """Заглушка Bot API; возвращает сервер и base_url для telegram.Bot."""
+    server = start_server(TelegramHandler)
+    return server, f'http://127.0.0.1:{server.server_port}/bot'
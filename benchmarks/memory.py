@@ -0,0 +1,92 @@
+"""Память на одну отслеживаемую работу при миллионе работ.
+
+Сравнивает словари из JSON ответа API, словари «работа → статус»
+и таблицу StatusTable. Запуск из корня репозитория:
+
+    python -m benchmarks.memory --homeworks 1000000
+"""
+import argparse
+import json
+import tracemalloc
+
+from records import Status, StatusTable
+
+RESULT = '{name:<28} {bytes_per_homework:>7.0f} байт на работу'
+HOMEWORKS_PER_TOKEN = 10
+STATUSES = [status.value for status in Status]
+
+
+def api_rows(homeworks):
+    """Строки (токен, работа, статус) как после разбора JSON."""
+    for number in range(homeworks):
+        yield (
+            f'token-{number // HOMEWORKS_PER_TOKEN}',
+            str(number),
+            json.loads(f'"{STATUSES[number % len(STATUSES)]}"')
+        )
+
+
+def build_api_dicts(homeworks):
+    """Работы целиком, как их отдаёт API."""
+    return [
+        json.loads(json.dumps({
+            'id': number,
+            'homework_name': f'user__hw{number}.zip',
+            'status': STATUSES[number % len(STATUSES)],
+            'reviewer_comment': 'Замечаний нет.',
+            'date_updated': '2020-02-13T14:40:57Z',
+            'lesson_name': 'Итоговый проект',
+        }))
+        for number in range(homeworks)
+    ]
+
+
+def build_status_dicts(homeworks):
+    """Словари токен → {работа: строка статуса}."""
+    table = {}
+    for token, homework, status in api_rows(homeworks):
+        table.setdefault(token, {})[homework] = status
+    return table
+
+
+def build_status_table(homeworks):
+    """Таблица StatusTable: работа → общий член Status."""
+    table = StatusTable()
+    rows = {}
+    for token, homework, status in api_rows(homeworks):
+        rows.setdefault(token, []).append((homework, status))
+    for token, token_rows in rows.items():
+        table.load(token, token_rows)
+    return table
+
+
+def measure(build, homeworks):
+    """Байт на работу в структуре, которую строит build."""
+    tracemalloc.start()
+    try:
+        structure = build(homeworks)
+        size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del structure
+    return size / homeworks
+
+
+def main():
+    """Разбор аргументов и печать результатов."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--homeworks', type=int, default=1_000_000)
+    homeworks = parser.parse_args().homeworks
+    for name, build in (
+        ('словари из JSON', build_api_dicts),
+        ('словари работа → статус', build_status_dicts),
+        ('StatusTable', build_status_table),
+    ):
+        print(RESULT.format(
+            name=name,
+            bytes_per_homework=measure(build, homeworks)
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+"""Пропускная способность и задержки цепочки опрос → разбор → уведомление.
+
+Каждый токен проходит get_api_answer, check_response, parse_status для
+каждой работы и send_message. Стенд --stand mock использует заглушки
+из tests/utils.py и меряет только код бота, --stand http — локальные
+HTTP-заглушки API Практикума и Bot API. Запуск из корня репозитория:
+
+    python -m benchmarks.pipeline --stand http --tenants 1 100 10000 \
+        --output benchmarks/results/pipeline.json \
+        --baseline benchmarks/results/pipeline.json
+"""
+import argparse
+import json
+import logging
+import pathlib
+import time
+
+import requests
+import telegram
+
+from benchmarks.fakes import make_homeworks, start_practicum, start_telegram
+from homework import (MESSAGES_SEPARATOR, check_response, make_headers,
+                      parse_status, request_homework_statuses,
+                      send_message_to_chat)
+from tests.utils import MockResponseGET, MockTelegramBot
+
+STAGES = ('get_api_answer', 'check_response', 'parse_status', 'send_message')
+HOMEWORKS_PER_TENANT = 3
+
+RESULT = ('{tenants:>6} подписок, {stage:<15} {calls:>7} вызовов '
+          '{throughput:>10,.0f} /с  p50 {p50_ms:8.3f} мс  p99 {p99_ms:8.3f} мс'
+          '{change}')
+CHANGE = '  p99 {ratio:+.0%} к базовому'
+
+
+class PayloadResponse(MockResponseGET):
+    """Заглушка ответа API из тестов с заданным списком работ."""
+
+    def __init__(self, *args, homeworks=(), **kwargs):
+        """Запоминает работы, которые вернёт json()."""
+        super().__init__(*args, random_timestamp=1581604970, **kwargs)
+        self.homeworks = list(homeworks)
+
+    def json(self):
+        """Ответ API с заданными работами."""
+        data = super().json()
+        data['homeworks'] = self.homeworks
+        return data
+
+
+def timed(latencies, function, *args):
+    """Вызывает function и добавляет длительность вызова в latencies."""
+    started = time.perf_counter()
+    result = function(*args)
+    latencies.append(time.perf_counter() - started)
+    return result
+
+
+def percentile(values, share):
+    """Значение, не превышаемое долей share наблюдений."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(share * len(ordered)))]
+
+
+def summarize(tenants, latencies):
+    """Сводка по этапам: число вызовов, пропускная способность, p50, p99."""
+    return [
+        dict(
+            tenants=tenants,
+            stage=stage,
+            calls=len(values),
+            throughput=len(values) / (sum(values) or float('inf')),
+            p50_ms=percentile(values, 0.5) * 1000,
+            p99_ms=percentile(values, 0.99) * 1000,
+        )
+        for stage, values in latencies.items()
+        if values
+    ]
+
+
+def run(tenants, http_get, bot):
+    """Прогоняет цепочку для tenants токенов по очереди."""
+    latencies = {stage: [] for stage in STAGES}
+    for number in range(tenants):
+        response = timed(
+            latencies['get_api_answer'],
+            request_homework_statuses,
+            http_get,
+            make_headers(f'token-{number}'),
+            0
+        )
+        homeworks = timed(latencies['check_response'], check_response,
+                          response)
+        message = MESSAGES_SEPARATOR.join(
+            timed(latencies['parse_status'], parse_status, homework)
+            for homework in homeworks
+        )
+        timed(latencies['send_message'], send_message_to_chat, bot,
+              str(number + 1), message)
+    return summarize(tenants, latencies)
+
+
+def mock_stand():
+    """Заглушки из тестов: HTTP-клиент и бот без сети."""
+    def http_get(url, **kwargs):
+        return PayloadResponse(
+            url, homeworks=make_homeworks(HOMEWORKS_PER_TENANT), **kwargs
+        )
+    return http_get, MockTelegramBot(), []
+
+
+def http_stand():
+    """Локальные HTTP-заглушки API Практикума и Bot API."""
+    practicum, endpoint = start_practicum(HOMEWORKS_PER_TENANT)
+    telegram_api, base_url = start_telegram()
+    session = requests.Session()
+
+    def http_get(url, **kwargs):
+        return session.get(endpoint, **kwargs)
+    bot = telegram.Bot(token='123:benchmark', base_url=base_url)
+    return http_get, bot, [practicum, telegram_api]
+
+
+def change(result, baseline):
+    """Изменение p99 результата относительно базового прогона."""
+    previous = baseline.get((result['tenants'], result['stage']))
+    if previous is None or not previous['p99_ms']:
+        return ''
+    return CHANGE.format(ratio=result['p99_ms'] / previous['p99_ms'] - 1)
+
+
+def load_baseline(path, stand):
+    """Базовые результаты того же стенда: (подписки, этап) → результат."""
+    if not path or not pathlib.Path(path).exists():
+        return {}
+    return {
+        (result['tenants'], result['stage']): result
+        for result in json.loads(pathlib.Path(path).read_text())
+        if result.get('stand') == stand
+    }
+
+
+def main():
+    """Разбор аргументов, прогон и сохранение результатов."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument('--stand', choices=('mock', 'http'), default='mock')
+    parser.add_argument(
+        '--tenants', type=int, nargs='+', default=[1, 100, 10_000]
+    )
+    parser.add_argument('--output', help='куда сохранить результаты JSON')
+    parser.add_argument('--baseline', help='результаты для сравнения')
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    http_get, bot, servers = {'mock': mock_stand, 'http': http_stand}[
+        args.stand
+    ]()
+    baseline = load_baseline(args.baseline, args.stand)
+    results = []
+    try:
+        for tenants in args.tenants:
+            for result in run(tenants, http_get, bot):
+                print(RESULT.format(
+                    change=change(result, baseline), **result
+                ))
+                results.append(dict(result, stand=args.stand))
+    finally:
+        for server in servers:
+            server.shutdown()
+    if args.output:
+        output = pathlib.Path(args.output)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(
+            json.dumps(results, ensure_ascii=False, indent=2)
+        )
+
+
+if __name__ == '__main__':
+    main()
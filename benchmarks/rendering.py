@@ -0,0 +1,85 @@
+"""Стоимость текста уведомления: str.format против собранных шаблонов.
+
+Для каждого варианта печатаются время и пик временной памяти (сверх
+самого текста) на одно уведомление. Запуск из корня репозитория:
+
+    python -m benchmarks.rendering --messages 100000
+"""
+import argparse
+import sys
+import time
+import tracemalloc
+
+from homework import (HOMEWORK_VERDICTS, REVIEWER_COMMENT, STATUS_CHANGED,
+                      TEMPLATES)
+from templates import HTML, MARKDOWN_V2, escape
+
+RESULT = ('{case:<32} {ns:8.0f} нс, '
+          'временная память {peak_bytes:5d} байт на уведомление')
+COMMENT = 'Всё хорошо, но поправьте отступы (PEP 8).'
+
+
+def formatted(name, status, markup, comment):
+    """Прежний способ: format всего текста и экранирование целиком."""
+    verdict = HOMEWORK_VERDICTS[status]
+    if comment:
+        verdict = REVIEWER_COMMENT.format(comment=comment) + verdict
+    return escape(
+        STATUS_CHANGED.format(homework_name=name, verdict=verdict), markup
+    )
+
+
+def rendered(name, status, markup, comment):
+    """Собранные заранее фрагменты шаблона."""
+    return TEMPLATES.render(name, status, 'ru', markup, comment)
+
+
+CASES = {
+    'format': (formatted, None, None),
+    'шаблон': (rendered, None, None),
+    'format, MarkdownV2, комментарий': (formatted, MARKDOWN_V2, COMMENT),
+    'шаблон, MarkdownV2, комментарий': (rendered, MARKDOWN_V2, COMMENT),
+    'format, HTML': (formatted, HTML, None),
+    'шаблон, HTML': (rendered, HTML, None),
+}
+
+
+def run(case, messages):
+    """Время и выделения памяти на одно уведомление варианта case."""
+    function, markup, comment = CASES[case]
+    statuses = list(HOMEWORK_VERDICTS)
+    arguments = [
+        (f'user__hw{number}.zip', statuses[number % len(statuses)])
+        for number in range(messages)
+    ]
+    started = time.perf_counter()
+    for name, status in arguments:
+        function(name, status, markup, comment)
+    elapsed = time.perf_counter() - started
+    tracemalloc.start()
+    peak_bytes = 0
+    for name, status in arguments[:1000]:
+        tracemalloc.reset_peak()
+        current, _ = tracemalloc.get_traced_memory()
+        text = function(name, status, markup, comment)
+        _, peak = tracemalloc.get_traced_memory()
+        peak_bytes = max(peak_bytes, peak - current - sys.getsizeof(text))
+    tracemalloc.stop()
+    return dict(
+        case=case,
+        ns=elapsed / messages * 1e9,
+        peak_bytes=peak_bytes,
+    )
+
+
+def main():
+    """Разбор аргументов и печать результатов."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--messages', type=int, default=100_000)
+    messages = parser.parse_args().messages
+    for case in CASES:
+        print(RESULT.format(**run(case, messages)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""Пропускная способность очереди опросов на 100k+ подписок.
+
+Запуск из корня репозитория:
+
+    python -m benchmarks.scheduler --tenants 100000 1000000
+"""
+import argparse
+import random
+import time
+
+from scheduling import PollQueue
+from subscriptions import Subscription
+
+RESULT = ('{tenants:>9} подписок: постановка {push_rate:,.0f} оп/с, '
+          'тик с переносом {tick_rate:,.0f} оп/с, '
+          'пустой тик {idle_tick_us:.1f} мкс')
+
+
+def run(tenants, period=600, ticks=100):
+    """Ставит подписки в очередь и прогоняет тики с переносом опросов."""
+    subscriptions = [
+        Subscription(str(number), str(number), 1) for number in range(tenants)
+    ]
+    for subscription in subscriptions:
+        subscription.next_poll = random.uniform(0, period)
+
+    queue = PollQueue()
+    started = time.perf_counter()
+    for subscription in subscriptions:
+        queue.push(subscription)
+    push_rate = tenants / (time.perf_counter() - started)
+
+    moved = 0
+    started = time.perf_counter()
+    for tick in range(1, ticks + 1):
+        now = period * tick / ticks
+        for subscription in queue.pop_due(now):
+            subscription.next_poll = now + period
+            queue.push(subscription)
+            moved += 1
+    tick_rate = moved / (time.perf_counter() - started)
+
+    started = time.perf_counter()
+    for _ in range(1000):
+        queue.pop_due(0)
+    idle_tick_us = (time.perf_counter() - started) * 1000
+
+    return dict(
+        tenants=tenants,
+        push_rate=push_rate,
+        tick_rate=tick_rate,
+        idle_tick_us=idle_tick_us
+    )
+
+
+def main():
+    """Разбор аргументов и печать результатов."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        '--tenants', type=int, nargs='+', default=[100_000, 1_000_000]
+    )
+    for tenants in parser.parse_args().tenants:
+        print(RESULT.format(**run(tenants)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""Время холодного импорта точек входа по данным python -X importtime.
+
+Запуск из корня репозитория; с --limit-ms завершается с ошибкой, если
+медиана превышает порог:
+
+    python -m benchmarks.startup --modules homework --limit-ms 100
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+
+RESULT = ('{module:<10} медиана {median_ms:6.1f} мс, '
+          'лучшее {best_ms:6.1f} мс; тяжелее всего: {heaviest}')
+OVER_LIMIT = '{module}: {median_ms:.1f} мс больше порога {limit_ms} мс'
+HEAVIEST = 3
+
+
+def import_tree(module):
+    """Строки -X importtime: (глубина, модуль, накопленное время в мкс)."""
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    tree = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        _, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        tree.append((depth, name.strip(), int(cumulative_us)))
+    return tree
+
+
+def direct_imports(tree):
+    """Модули, импортированные непосредственно замеряемым, и их время."""
+    children = []
+    for depth, name, cumulative_us in reversed(tree[:-1]):
+        if depth == 0:
+            break
+        if depth == 1:
+            children.append((name, cumulative_us))
+    return children
+
+
+def run(module, repeat):
+    """Медиана и лучшее время импорта module за repeat запусков."""
+    totals = []
+    for _ in range(repeat):
+        tree = import_tree(module)
+        totals.append(tree[-1][2] / 1000)
+    heaviest = sorted(
+        direct_imports(tree), key=lambda child: child[1], reverse=True
+    )[:HEAVIEST]
+    return dict(
+        module=module,
+        median_ms=statistics.median(totals),
+        best_ms=min(totals),
+        heaviest=', '.join(
+            f'{name} {cumulative_us / 1000:.1f} мс'
+            for name, cumulative_us in heaviest
+        )
+    )
+
+
+def main():
+    """Разбор аргументов, замер и проверка порога."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument('--modules', nargs='+', default=['homework'])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--limit-ms', type=float)
+    args = parser.parse_args()
+    over_limit = []
+    for module in args.modules:
+        result = run(module, args.repeat)
+        print(RESULT.format(**result))
+        if args.limit_ms is not None and result['median_ms'] > args.limit_ms:
+            over_limit.append(OVER_LIMIT.format(
+                limit_ms=args.limit_ms, **result
+            ))
+    if over_limit:
+        sys.exit('\n'.join(over_limit))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""Стоимость разбора и проверки ответа API на больших списках работ.
+
+Запуск из корня репозитория:
+
+    python -m benchmarks.validation --homeworks 100 10000 1000000
+"""
+import argparse
+import json
+import time
+
+import schema
+from homework import HOMEWORK_VERDICTS, check_response, parse_status
+
+RESULT = ('{homeworks:>9} работ: JSON ({decoder}) {decode_us:.2f} мкс, '
+          'проверка ответа {response_us:.3f} мкс, '
+          'разбор статуса {status_us:.2f} мкс на работу')
+
+
+def make_payload(homeworks):
+    """Тело ответа API с homeworks работами."""
+    statuses = list(HOMEWORK_VERDICTS)
+    return json.dumps({
+        'homeworks': [
+            {
+                'id': number,
+                'homework_name': f'user__hw{number}.zip',
+                'status': statuses[number % len(statuses)],
+                'reviewer_comment': 'Замечаний нет.',
+                'date_updated': '2020-02-13T14:40:57Z',
+                'lesson_name': 'Итоговый проект',
+            }
+            for number in range(homeworks)
+        ],
+        'current_date': 1581604970,
+    }).encode()
+
+
+def per_item(function, items, repeat=3):
+    """Лучшее из repeat время вызова function на элемент, в мкс."""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - started)
+    return best / max(items, 1) * 1e6
+
+
+def run(homeworks):
+    """Замеряет декодирование, проверку ответа и разбор статусов."""
+    content = make_payload(homeworks)
+    response = schema.loads(content)
+    return dict(
+        homeworks=homeworks,
+        decoder='orjson' if schema.orjson is not None else 'json',
+        decode_us=per_item(lambda: schema.loads(content), homeworks),
+        response_us=per_item(lambda: check_response(response), homeworks),
+        status_us=per_item(
+            lambda: [parse_status(homework)
+                     for homework in response['homeworks']],
+            homeworks
+        ),
+    )
+
+
+def main():
+    """Разбор аргументов и печать результатов."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        '--homeworks', type=int, nargs='+', default=[100, 10_000, 1_000_000]
+    )
+    for homeworks in parser.parse_args().homeworks:
+        print(RESULT.format(**run(homeworks)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+import logging
+import os
+
+from homework import HOMEWORK_VERDICTS
+
+BOT_COMMANDS = os.getenv('BOT_COMMANDS', '') not in ('', '0')
+COMMAND_WORKERS = int(os.getenv('COMMAND_WORKERS', 8))
+TELEGRAM_WEBHOOK_URL = os.getenv('TELEGRAM_WEBHOOK_URL')
+TELEGRAM_WEBHOOK_PORT = int(os.getenv('TELEGRAM_WEBHOOK_PORT', 8443))
+
+SUBSCRIBE_USAGE = 'Использование: /subscribe <токен Практикума>'
+SUBSCRIBED = 'Подписка оформлена, проверяю статусы работ.'
+UNSUBSCRIBED = 'Подписка отменена.'
+TOKEN_TAKEN = 'Этот токен уже подписан в другом чате.'
+ALREADY_SUBSCRIBED = 'Чат уже подписан на этот токен.'
+NOT_SUBSCRIBED = 'Чат не подписан. ' + SUBSCRIBE_USAGE
+STATUS_LINE = '{homework}: {status}'
+NO_STATUSES = 'Статусов пока нет.'
+COMMANDS_ARE_WORKING = 'Команды бота принимаются: {mode}'
+
+
+def subscribe(update, context):
+    """/subscribe <токен>: подписывает чат на статусы работ токена."""
+    if len(context.args) != 1:
+        update.message.reply_text(SUBSCRIBE_USAGE)
+        return
+    token = context.args[0]
+    chat_id = str(update.effective_chat.id)
+    data = context.bot_data
+    current = data['registry'].get(token)
+    if current is not None:
+        # Повторная подписка не пересоздаётся: иначе сбросились бы курсор,
+        # адреса из файла подписок и неподтверждённые статусы.
+        update.message.reply_text(
+            TOKEN_TAKEN if str(current.chat_id) != chat_id
+            else ALREADY_SUBSCRIBED
+        )
+        return
+    subscription = data['registry'].add(token, chat_id)
+    data['store'].save_subscription(token, chat_id)
+    data['store'].commit()
+    update.message.reply_text(SUBSCRIBED)
+    data['poll'](subscription)
+    data['queue'].push(subscription)
+
+
+def unsubscribe(update, context):
+    """/unsubscribe: отписывает чат от всех токенов."""
+    data = context.bot_data
+    subscriptions = data['registry'].for_chat(update.effective_chat.id)
+    if not subscriptions:
+        update.message.reply_text(NOT_SUBSCRIBED)
+        return
+    for subscription in subscriptions:
+        data['registry'].remove(subscription.token)
+        data['store'].delete_subscription(subscription.token)
+    data['store'].commit()
+    update.message.reply_text(UNSUBSCRIBED)
+
+
+def status(update, context):
+    """/status: последние известные статусы работ чата."""
+    data = context.bot_data
+    subscriptions = data['registry'].for_chat(update.effective_chat.id)
+    if not subscriptions:
+        update.message.reply_text(NOT_SUBSCRIBED)
+        return
+    lines = []
+    for subscription in subscriptions:
+        names = data['store'].load_homework_names(subscription.token)
+        lines.extend(
+            STATUS_LINE.format(
+                homework=names.get(homework, homework),
+                status=HOMEWORK_VERDICTS.get(homework_status, homework_status)
+            )
+            for homework, homework_status in data['store'].load_statuses(
+                subscription.token
+            ).items()
+        )
+    update.message.reply_text('\n'.join(lines) or NO_STATUSES)
+
+
+def start_commands(token, registry, queue, store, poll):
+    """Запускает приём команд: вебхук, если задан адрес, иначе long polling.
+
+    Команды обрабатываются пулом из COMMAND_WORKERS потоков и не
+    задерживают опрос. poll(subscription) сразу опрашивает новую подписку.
+    """
+    from telegram.ext import CommandHandler, Updater
+
+    updater = Updater(token=token, workers=COMMAND_WORKERS)
+    dispatcher = updater.dispatcher
+    dispatcher.bot_data.update(
+        registry=registry, queue=queue, store=store, poll=poll
+    )
+    for command, callback in (
+        ('subscribe', subscribe),
+        ('unsubscribe', unsubscribe),
+        ('status', status),
+    ):
+        dispatcher.add_handler(
+            CommandHandler(command, callback, run_async=True)
+        )
+    if TELEGRAM_WEBHOOK_URL:
+        updater.start_webhook(
+            listen='0.0.0.0',
+            port=TELEGRAM_WEBHOOK_PORT,
+            url_path=token,
+            webhook_url=f'{TELEGRAM_WEBHOOK_URL.rstrip("/")}/{token}'
+        )
+        mode = 'webhook'
+    else:
+        updater.start_polling()
+        mode = 'long polling'
+    logging.info(COMMANDS_ARE_WORKING.format(mode=mode))
+    return updater
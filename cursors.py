@@ -0,0 +1,40 @@
+import logging
+import os
+
+CURSOR_OVERLAP = int(os.getenv('CURSOR_OVERLAP', 60))
+MAX_CATCH_UP = int(os.getenv('MAX_CATCH_UP', 7 * 24 * 3600))
+
+LONG_CATCH_UP = ('Курсор отстал на {lag} с: ответ API вернёт все '
+                 'изменения за это время')
+
+
+def advance_cursor(cursor, current_date):
+    """Новый курсор: current_date ответа, но не раньше прежнего.
+
+    Ответ без целого current_date курсор не сдвигает и не сбрасывает.
+    """
+    if not isinstance(current_date, int) or isinstance(current_date, bool):
+        return cursor
+    if cursor is None:
+        return current_date
+    return max(cursor, current_date)
+
+
+def poll_from_date(cursor, now, overlap=CURSOR_OVERLAP,
+                   max_catch_up=MAX_CATCH_UP):
+    """from_date запроса: курсор с перекрытием overlap секунд.
+
+    Перекрытие страхует от расхождения часов и изменений, попавших
+    между ответами; повторы в нём отсеиваются по сохранённым статусам
+    работ. Курсор, отставший после простоя, не обрезается, чтобы
+    изменения из пропуска не потерялись. Верхней границы у запроса API
+    нет, поэтому пропуск нельзя пройти частями: первый же ответ
+    содержит его целиком, а отставание больше max_catch_up секунд
+    только записывается в лог. Без курсора опрос начинается с now.
+    """
+    now = int(now)
+    if cursor is None:
+        return now
+    if now - int(cursor) > max_catch_up:
+        logging.warning(LONG_CATCH_UP.format(lag=now - int(cursor)))
+    return int(cursor) - overlap
@@ -14,3 +14,9 @@ class IncorrectFormatError(Exception):
     """Ошибка: некорректный формат ответа."""
 
     pass
+
+
+class CircuitOpenError(Exception):
+    """Ошибка: запросы к API приостановлены после череды сбоев."""
+
+    pass
@@ -4,15 +4,20 @@ import sys
 import time
 from http import HTTPStatus
 
-import requests
-import telegram
-from dotenv import load_dotenv
-from telegram import TelegramError
+if __name__ == '__main__':
+    # Настройки модулей ниже читаются при импорте, поэтому .env — до них.
+    from dotenv import load_dotenv
+    load_dotenv()
 
+from alerts import PROGRAM_RECOVERED, ErrorNotifier
+from cursors import advance_cursor, poll_from_date
 from exceptions import HtppError, IncorrectFormatError
-
-load_dotenv()
-
+from log_config import setup_logging
+from schema import Field, compile_schema
+from scheduling import next_poll_delay
+from storage import open_state_store
+from templates import (NOTIFICATION_LOCALE, TRANSLATIONS, Locale,
+                       Templates)
 
 PRACTICUM_TOKEN = os.getenv('PRACTICUM_TOKEN')
 TELEGRAM_TOKEN = os.getenv('TELEGRAM_TOKEN')
@@ -45,11 +50,38 @@ PRACTICUM_TOKEN_ERROR = 'Токен Практикума недоступен'
 TELEGRAM_TOKEN_ERROR = 'Токен телеграм бота недоступен'
 TELEGRAM_CHAT_ID_ERROR = 'ID чата недоступно'
 CONNECTION_ERROR = ('Ошибка соединения {error} с параметрами: '
-                    '{url}, {headers}, {params}')
+                    '{url}, {params}')
 HTTP_ERROR = 'Ошибка соединения: {status}, {text}'
-UNEXPECTED_STATUS = 'Неожиданный статус работы: "{status}"'
+UNEXPECTED_STATUS = 'Неожиданный статус работы: "{value}"'
+INVALID_FIELD_TYPE = 'Неверный тип поля: {value!r}'
 STATUS_CHANGED = ('Изменился статус проверки работы "{homework_name}".'
                   '{verdict}')
+REVIEWER_COMMENT = ' Комментарий ревьюера: «{comment}». '
+PROGRAM_FAILURE = 'Сбой в работе программы: {error}'
+MESSAGES_SEPARATOR = '\n\n'
+MAX_MESSAGE_LENGTH = 4096
+
+validate_response = compile_schema(
+    'HomeworkStatuses',
+    (
+        Field('homeworks', list, KEY_MISSED, INAPPROPRIATE_FORMAT),
+        Field('current_date', int, KEY_MISSED, INVALID_FIELD_TYPE),
+    ),
+    NOT_API_FORMAT
+)
+validate_homework = compile_schema(
+    'Homework',
+    (
+        Field('homework_name', str, NAME_IS_NOT_EXIST, INVALID_FIELD_TYPE),
+        Field('status', str, STATUS_IS_NOT_EXIST, INVALID_FIELD_TYPE,
+              HOMEWORK_VERDICTS, UNEXPECTED_STATUS),
+    ),
+    INAPPROPRIATE_FORMAT
+)
+TEMPLATES = Templates(dict(
+    TRANSLATIONS,
+    ru=Locale(STATUS_CHANGED, HOMEWORK_VERDICTS, REVIEWER_COMMENT)
+))
 
 
 def check_tokens():
@@ -70,11 +102,50 @@ def check_tokens():
             return token_name
 
 
-def send_message(bot, message):
-    """Бот отправляет сообщение в чат."""
+def make_headers(token):
+    """Заголовки авторизации для токена Практикума."""
+    return {'Authorization': f'OAuth {token}'}
+
+
+def split_message(text, limit=MAX_MESSAGE_LENGTH):
+    """Части текста не длиннее limit для отдельных сообщений Telegram.
+
+    Текст делится между уведомлениями по MESSAGES_SEPARATOR, а слишком
+    длинное уведомление — по последнему пробелу перед границей: в
+    экранировании разметки пробелов нет, и оно не разрывается. Короткие
+    уведомления снова собираются в части до limit символов.
+    """
+    pieces = []
+    for notice in text.split(MESSAGES_SEPARATOR):
+        while len(notice) > limit:
+            cut = max(
+                notice.rfind(' ', 1, limit), notice.rfind('\n', 1, limit)
+            )
+            if cut <= 0:
+                cut = limit
+            pieces.append(notice[:cut])
+            notice = notice[cut:].lstrip()
+        pieces.append(notice)
+    parts = [pieces[0]]
+    for piece in pieces[1:]:
+        if len(parts[-1]) + len(MESSAGES_SEPARATOR) + len(piece) <= limit:
+            parts[-1] += MESSAGES_SEPARATOR + piece
+        else:
+            parts.append(piece)
+    return parts
+
+
+def send_message_to_chat(bot, chat_id, message):
+    """Бот отправляет сообщение в указанный чат.
+
+    Текст длиннее MAX_MESSAGE_LENGTH уходит несколькими сообщениями.
+    """
+    from telegram import TelegramError
+
     try:
-        bot.send_message(TELEGRAM_CHAT_ID, message)
-        logging.debug(TRY_MESSAGE, exc_info=True)
+        for part in split_message(message):
+            bot.send_message(chat_id, part)
+        logging.debug(TRY_MESSAGE)
     except TelegramError as error:
         my_value = f'не отправлено. {error}'
         logging.exception(
@@ -83,21 +154,29 @@ def send_message(bot, message):
                 my_key=my_value),
             exc_info=True
         )
-    else:
-        my_value = 'отправлено.'
-        logging.info(
-            STATUS_OF_MESSAGE.format(message=message, my_key=my_value)
-        )
+        return False
+    my_value = 'отправлено.'
+    logging.info(
+        STATUS_OF_MESSAGE.format(message=message, my_key=my_value)
+    )
+    return True
 
 
-def get_api_answer(timestamp):
-    """Делает запрос к единственному эндпоинту API-сервиса."""
-    current_timestamp = timestamp or int(time.time())
+def send_message(bot, message):
+    """Бот отправляет сообщение в чат."""
+    return send_message_to_chat(bot, TELEGRAM_CHAT_ID, message)
+
+
+def send_api_request(http_get, headers, timestamp):
+    """Отправляет запрос к API и возвращает объект ответа."""
+    import requests
+
+    current_timestamp = int(time.time()) if timestamp is None else timestamp
     payload = {'from_date': current_timestamp}
     try:
-        response = requests.get(
+        return http_get(
             ENDPOINT,
-            headers=HEADERS,
+            headers=headers,
             params=payload
         )
     except requests.exceptions.RequestException as error:
@@ -105,50 +184,109 @@ def get_api_answer(timestamp):
             CONNECTION_ERROR.format(
                 error=error,
                 url=ENDPOINT,
-                headers=HEADERS,
                 params=payload
             )
         )
+
+
+def parse_api_response(response, loads=None):
+    """Проверяет код ответа API и разбирает JSON.
+
+    loads(content) заменяет response.json(), например более быстрым
+    декодером.
+    """
     if response.status_code != HTTPStatus.OK:
         raise HtppError(HTTP_ERROR.format(
             status=response.status_code,
             text=response.text))
     try:
+        if loads is not None:
+            return loads(response.content)
         return response.json()
-    except TypeError as error:
+    except (TypeError, ValueError) as error:
         raise IncorrectFormatError(
             NOT_JSON.format(error=error)
         )
 
 
+def request_homework_statuses(http_get, headers, timestamp):
+    """Запрашивает статусы работ с заголовками конкретного токена."""
+    return parse_api_response(
+        send_api_request(http_get, headers, timestamp)
+    )
+
+
+def get_api_answer(timestamp):
+    """Делает запрос к единственному эндпоинту API-сервиса."""
+    import requests
+
+    return request_homework_statuses(requests.get, HEADERS, timestamp)
+
+
 def check_response(response):
     """Проверяет ответ API на соответствие документации."""
-    if not isinstance(response, dict):
-        logging.error(NOT_API_FORMAT)
-        raise TypeError(NOT_API_FORMAT)
-    if 'homeworks' not in response:
-        raise KeyError(KEY_MISSED)
-    if 'current_date' not in response:
-        raise KeyError(KEY_MISSED)
-    if not isinstance(response.get('homeworks'), list):
-        raise TypeError(INAPPROPRIATE_FORMAT)
-    return response.get('homeworks')
+    return validate_response(response).homeworks
+
+
+def homework_key(homework):
+    """Ключ работы для хранения статуса: id, а без него — название."""
+    return str(homework.get('id', homework.get('homework_name')))
+
+
+def render_status(homework, locale=NOTIFICATION_LOCALE, markup=None,
+                  comments=False):
+    """Уведомление о статусе работы на языке locale в разметке markup.
+
+    С comments=True в текст попадает комментарий ревьюера, если он есть.
+    """
+    homework_name, status = validate_homework(homework)
+    comment = homework.get('reviewer_comment') if comments else None
+    return TEMPLATES.render(
+        homework_name, status, locale, markup, comment and str(comment)
+    )
 
 
 def parse_status(homework):
     """Извлекает из информации о конкретной домашней работе статус."""
-    if 'homework_name' not in homework:
-        raise KeyError(NAME_IS_NOT_EXIST)
-    if 'status' not in homework:
-        raise KeyError(STATUS_IS_NOT_EXIST)
-    status = homework['status']
-    if status not in HOMEWORK_VERDICTS:
-        raise ValueError(UNEXPECTED_STATUS.format(status=status))
-    verdict = HOMEWORK_VERDICTS[status]
-    homework_name = homework.get('homework_name')
-    return (STATUS_CHANGED.format(
-        homework_name=homework_name,
-        verdict=verdict))
+    return render_status(homework)
+
+
+def select_new_statuses(homeworks, notified):
+    """Работы, статус которых ещё не сообщался.
+
+    notified — последние отправленные статусы: ключ работы → статус.
+    Повтор работы в одном ответе учитывается один раз.
+    """
+    new_homeworks = []
+    seen = set()
+    for homework in homeworks:
+        key = homework_key(homework)
+        if key in seen or notified.get(key) == homework.get('status'):
+            continue
+        seen.add(key)
+        new_homeworks.append(homework)
+    return new_homeworks
+
+
+def parse_statuses(homeworks, **options):
+    """Одно сообщение со статусами всех переданных работ.
+
+    options передаются в render_status.
+    """
+    return MESSAGES_SEPARATOR.join(
+        render_status(homework, **options) for homework in homeworks
+    )
+
+
+def remember_statuses(store, token, homeworks):
+    """Запоминает отправленные статусы работ."""
+    for homework in homeworks:
+        store.save_status(
+            token,
+            homework_key(homework),
+            homework.get('status'),
+            homework.get('homework_name')
+        )
 
 
 def main():
@@ -157,30 +295,51 @@ def main():
     if not check_tokens():
         logging.critical(NO_TOKENS)
         sys.exit(WORK_WAS_ENDED)
+    import telegram
+
     bot = telegram.Bot(token=TELEGRAM_TOKEN)
-    timestamp = int(time.time())
+    store = open_state_store()
+    cursor = store.load_cursor(PRACTICUM_TOKEN)
+    changed_at = time.time()
+    notifier = ErrorNotifier()
     while True:
         try:
-            response = get_api_answer(timestamp)
-            timestamp = response.get('current_date')
+            response = get_api_answer(poll_from_date(cursor, time.time()))
             homeworks_list = check_response(response)
-            if len(homeworks_list) > 0:
-                homework = homeworks_list[0]
-                message = parse_status(homework)
-                send_message(bot, message)
+            new_homeworks = select_new_statuses(
+                homeworks_list,
+                store.load_statuses(PRACTICUM_TOKEN)
+            )
+            delivered = True
+            if new_homeworks:
+                changed_at = time.time()
+                message = parse_statuses(new_homeworks)
+                delivered = send_message(bot, message)
+                if delivered:
+                    remember_statuses(store, PRACTICUM_TOKEN, new_homeworks)
             else:
                 logging.debug(NOTHING_TO_CHECK)
+            # Без доставки курсор не сдвигается: работы придут снова.
+            if delivered:
+                cursor = advance_cursor(cursor, response.get('current_date'))
+                store.save_cursor(PRACTICUM_TOKEN, cursor)
         except Exception as error:
-            message = f'Сбой в работе программы: {error}'
-            send_message(bot, message)
+            message = PROGRAM_FAILURE.format(error=error)
+            if notifier.should_notify(PRACTICUM_TOKEN, error):
+                send_message(bot, message)
             logging.error(message)
-        time.sleep(RETRY_PERIOD)
+        else:
+            if notifier.recovered(PRACTICUM_TOKEN):
+                send_message(bot, PROGRAM_RECOVERED)
+        store.commit()
+        retry_period = next_poll_delay(
+            RETRY_PERIOD,
+            store.has_reviewing(PRACTICUM_TOKEN),
+            time.time() - changed_at
+        )
+        time.sleep(retry_period)
 
 
 if __name__ == '__main__':
-    logging.basicConfig(
-        level=logging.DEBUG,
-        filename='program.log',
-        format='%(asctime)s, %(levelname)s, %(message)s, %(name)s'
-    )
+    setup_logging(logging.getLogger())
     main()
@@ -0,0 +1,69 @@
+import json
+import logging
+import os
+import threading
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+INGEST_HOST = os.getenv('INGEST_HOST', '0.0.0.0')
+INGEST_PORT = int(os.getenv('INGEST_PORT', 0))
+INGEST_PATH = '/homework_statuses/'
+MAX_EVENT_SIZE = 1024 * 1024
+
+INGEST_IS_WORKING = 'Приём событий запущен на порту {port}'
+EVENT_REJECTED = 'Событие отклонено: {status}'
+
+
+class IngestHandler(BaseHTTPRequestHandler):
+    """Принимает POST со статусами работ в формате ответа API.
+
+    Токен передаётся так же, как в запросе к API:
+    «Authorization: OAuth <токен>».
+    """
+
+    def do_POST(self):
+        """Разбирает событие и передаёт его обработчику сервера."""
+        if self.path.rstrip('/') != INGEST_PATH.rstrip('/'):
+            return self.reply(HTTPStatus.NOT_FOUND)
+        token = self.headers.get('Authorization', '').partition('OAuth ')[2]
+        length = int(self.headers.get('Content-Length') or 0)
+        if not token:
+            return self.reply(HTTPStatus.UNAUTHORIZED)
+        if length > MAX_EVENT_SIZE:
+            return self.reply(HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+        try:
+            accepted = self.server.handle_event(
+                token,
+                json.loads(self.rfile.read(length))
+            )
+        except (KeyError, TypeError, ValueError):
+            return self.reply(HTTPStatus.BAD_REQUEST)
+        if not accepted:
+            return self.reply(HTTPStatus.NOT_FOUND)
+        return self.reply(HTTPStatus.ACCEPTED)
+
+    def reply(self, status):
+        """Отвечает пустым телом с кодом status."""
+        if status != HTTPStatus.ACCEPTED:
+            logging.warning(EVENT_REJECTED.format(status=status))
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        """Пишет журнал запросов в общий лог."""
+        logging.debug(format, *args)
+
+
+def start_ingest_server(handle_event, port=INGEST_PORT, host=INGEST_HOST):
+    """Запускает приём событий в фоновом потоке.
+
+    handle_event(token, payload) возвращает False, если токен неизвестен,
+    и бросает KeyError, TypeError или ValueError на некорректное событие.
+    """
+    server = ThreadingHTTPServer((host, port), IngestHandler)
+    server.daemon_threads = True
+    server.handle_event = handle_event
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    logging.info(INGEST_IS_WORKING.format(port=server.server_port))
+    return server
@@ -0,0 +1,92 @@
+import atexit
+import json
+import logging
+import os
+import random
+from hashlib import blake2b
+
+LOG_FILE = os.getenv('LOG_FILE', 'program.log')
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'DEBUG')
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'text')
+LOG_MAX_BYTES = int(os.getenv('LOG_MAX_BYTES', 10 * 1024 * 1024))
+LOG_BACKUP_COUNT = int(os.getenv('LOG_BACKUP_COUNT', 5))
+LOG_DEBUG_SAMPLE_RATE = float(os.getenv('LOG_DEBUG_SAMPLE_RATE', 1))
+TEXT_FORMAT = '%(asctime)s, %(levelname)s, %(message)s, %(name)s'
+CONTEXT_FIELDS = ('tenant', 'chat_id', 'homework')
+
+
+def tenant_id(token):
+    """Короткий отпечаток токена для логов вместо самого токена."""
+    return blake2b(token.encode(), digest_size=4).hexdigest()
+
+
+def tenant(token):
+    """Поле extra с отпечатком токена."""
+    return {'tenant': tenant_id(token)}
+
+
+class JsonFormatter(logging.Formatter):
+    """Запись лога одной строкой JSON с полями подписки, если они есть.
+
+    Трассировка исключения уже включена в сообщение QueueHandler'ом.
+    """
+
+    def format(self, record):
+        """Сериализует запись."""
+        data = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for field in CONTEXT_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                data[field] = value
+        return json.dumps(data, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    """Пропускает долю rate записей уровня DEBUG, остальные — все."""
+
+    def __init__(self, rate=LOG_DEBUG_SAMPLE_RATE):
+        """Запоминает долю пропускаемых отладочных записей."""
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        """Решает, попадёт ли запись в лог."""
+        return record.levelno > logging.DEBUG or random.random() < self.rate
+
+
+def setup_logging(logger, filename=LOG_FILE, level=LOG_LEVEL,
+                  json_format=LOG_FORMAT == 'json'):
+    """Направляет записи logger в файл через очередь.
+
+    Вызывающий поток только кладёт запись в очередь, а формирование
+    строки и запись в файл с ротацией по размеру выполняет фоновый
+    QueueListener. Возвращает запущенный слушатель; он останавливается
+    при выходе из программы, дописав очередь.
+    """
+    import queue
+    from logging.handlers import (QueueHandler, QueueListener,
+                                  RotatingFileHandler)
+
+    handler = RotatingFileHandler(
+        filename,
+        maxBytes=LOG_MAX_BYTES,
+        backupCount=LOG_BACKUP_COUNT,
+        encoding='utf-8'
+    )
+    handler.setFormatter(
+        JsonFormatter() if json_format else logging.Formatter(TEXT_FORMAT)
+    )
+    records = queue.SimpleQueue()
+    queue_handler = QueueHandler(records)
+    queue_handler.addFilter(SamplingFilter())
+    logger.addHandler(queue_handler)
+    logger.setLevel(level)
+    listener = QueueListener(records, handler)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
@@ -0,0 +1,200 @@
+import bisect
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+METRICS_PORT = int(os.getenv('METRICS_PORT', 0))
+METRICS_PATH = '/metrics'
+LATENCY_BUCKETS = (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60
+)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+METRICS_ARE_SERVED = 'Метрики доступны на порту {port}'
+
+
+def format_labels(labels):
+    """Метки в формате Prometheus: {name="value",...}."""
+    if not labels:
+        return ''
+    return '{' + ','.join(
+        f'{name}="{value}"' for name, value in labels
+    ) + '}'
+
+
+class Counter:
+    """Счётчик событий, при необходимости с одной меткой."""
+
+    kind = 'counter'
+
+    def __init__(self, name, documentation, label=None):
+        """Создаёт счётчик с нулевыми значениями."""
+        self.name = name
+        self.documentation = documentation
+        self.label = label
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, value=None, amount=1):
+        """Увеличивает счётчик метки value."""
+        with self._lock:
+            self._values[value] = self._values.get(value, 0) + amount
+
+    def value(self, value=None):
+        """Текущее значение счётчика метки value."""
+        return self._values.get(value, 0)
+
+    def samples(self):
+        """Строки экспозиции: имя, метки и значение."""
+        with self._lock:
+            values = dict(self._values)
+        for value, count in sorted(values.items(), key=str):
+            labels = () if value is None else ((self.label, value),)
+            yield self.name + '_total', labels, count
+
+
+class Gauge:
+    """Мгновенное значение, которое читается функцией при экспорте."""
+
+    kind = 'gauge'
+
+    def __init__(self, name, documentation):
+        """Создаёт показатель без источника значения."""
+        self.name = name
+        self.documentation = documentation
+        self._read = None
+
+    def set_function(self, read):
+        """Задаёт функцию, возвращающую текущее значение."""
+        self._read = read
+
+    def samples(self):
+        """Строка экспозиции, если источник значения задан."""
+        if self._read is not None:
+            yield self.name, (), self._read()
+
+
+class Histogram:
+    """Распределение длительностей по корзинам."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, buckets=LATENCY_BUCKETS):
+        """Создаёт пустую гистограмму."""
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        """Учитывает одно наблюдение."""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    @contextmanager
+    def time(self):
+        """Замеряет длительность блока with."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+    @property
+    def count(self):
+        """Количество наблюдений."""
+        return sum(self._counts)
+
+    def samples(self):
+        """Строки экспозиции: накопленные корзины, сумма и количество."""
+        with self._lock:
+            counts = list(self._counts)
+            total = self._sum
+        cumulative = 0
+        for bound, count in zip(self.buckets + ('+Inf',), counts):
+            cumulative += count
+            yield self.name + '_bucket', (('le', bound),), cumulative
+        yield self.name + '_sum', (), total
+        yield self.name + '_count', (), cumulative
+
+
+API_LATENCY = Histogram(
+    'homework_api_request_seconds',
+    'Длительность запроса к API Практикума с повторами'
+)
+PARSE_LATENCY = Histogram(
+    'homework_api_parse_seconds',
+    'Длительность разбора JSON ответа API'
+)
+SEND_LATENCY = Histogram(
+    'telegram_send_seconds',
+    'Длительность отправки сообщения в Telegram'
+)
+SCHEDULER_LAG = Histogram(
+    'poll_scheduler_lag_seconds',
+    'Опоздание опроса относительно назначенного времени'
+)
+ERRORS = Counter('errors', 'Ошибки опроса и отправки по типам', 'type')
+POLL_QUEUE_DEPTH = Gauge('poll_queue_depth', 'Подписок в очереди опроса')
+OUTBOX_DEPTH = Gauge('outbox_depth', 'Уведомлений в очереди отправки')
+
+METRICS = (
+    API_LATENCY, PARSE_LATENCY, SEND_LATENCY, SCHEDULER_LAG,
+    ERRORS, POLL_QUEUE_DEPTH, OUTBOX_DEPTH,
+)
+
+
+def count_error(error):
+    """Учитывает ошибку по имени её класса."""
+    ERRORS.inc(type(error).__name__)
+
+
+def render(metrics=METRICS):
+    """Текст метрик в формате экспозиции Prometheus."""
+    lines = []
+    for metric in metrics:
+        lines.append(f'# HELP {metric.name} {metric.documentation}')
+        lines.append(f'# TYPE {metric.name} {metric.kind}')
+        for name, labels, value in metric.samples():
+            lines.append(f'{name}{format_labels(labels)} {value}')
+    return '\n'.join(lines) + '\n'
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    """Отдаёт метрики по GET /metrics."""
+
+    def do_GET(self):
+        """Отвечает текстом метрик."""
+        if self.path.rstrip('/') != METRICS_PATH:
+            self.send_response(HTTPStatus.NOT_FOUND)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        body = render().encode()
+        self.send_response(HTTPStatus.OK)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        """Пишет журнал запросов в общий лог."""
+        logging.debug(format, *args)
+
+
+def start_metrics_server(port=METRICS_PORT, host=METRICS_HOST):
+    """Запускает отдачу метрик в фоновом потоке."""
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    logging.info(METRICS_ARE_SERVED.format(port=server.server_port))
+    return server
@@ -0,0 +1,361 @@
+import heapq
+import itertools
+import logging
+import math
+import os
+import threading
+import time
+from collections import deque
+
+from telegram.error import BadRequest, RetryAfter, TelegramError, Unauthorized
+
+from homework import MAX_MESSAGE_LENGTH, MESSAGES_SEPARATOR, split_message
+from metrics import SEND_LATENCY, count_error
+
+GLOBAL_SEND_RATE = float(os.getenv('GLOBAL_SEND_RATE', 30))
+CHAT_SEND_RATE = float(os.getenv('CHAT_SEND_RATE', 1))
+MAX_SEND_ATTEMPTS = int(os.getenv('MAX_SEND_ATTEMPTS', 5))
+# Пока поток ждёт ответа Telegram, он не отправляет, поэтому для
+# GLOBAL_SEND_RATE нужно около rate * задержку потоков.
+TYPICAL_SEND_LATENCY = 0.3
+SEND_WORKERS = int(os.getenv(
+    'SEND_WORKERS', math.ceil(GLOBAL_SEND_RATE * TYPICAL_SEND_LATENCY)
+))
+
+MESSAGE_SENT = 'Сообщение в чат {chat_id} отправлено: {count} уведомл.'
+FLOOD_LIMIT = 'Лимит Telegram для чата {chat_id}, повтор через {delay} с'
+SEND_FAILED = 'Сообщение в чат {chat_id} не отправлено: {error}'
+CALLBACK_FAILED = 'Обработчик уведомления для чата {chat_id} упал: {error}'
+SEND_DROPPED = ('Сообщение в чат {chat_id} отброшено после '
+                '{attempts} попыток: {error}')
+
+
+class TokenBucket:
+    """Ведро токенов: rate событий в секунду, всплеск до capacity."""
+
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated')
+
+    def __init__(self, rate, capacity=None, now=None):
+        """Создаёт полное ведро."""
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic() if now is None else now
+
+    def delay(self, now):
+        """Сколько ждать до появления токена; 0 — можно сейчас."""
+        self.tokens = min(
+            self.capacity,
+            self.tokens + (now - self.updated) * self.rate
+        )
+        self.updated = now
+        if self.tokens >= 1:
+            return 0
+        return (1 - self.tokens) / self.rate
+
+    def take(self):
+        """Забирает токен после успешной проверки delay()."""
+        self.tokens -= 1
+
+
+class Notice:
+    """Уведомление в очереди и действия после доставки или отказа от неё."""
+
+    __slots__ = ('text', 'on_sent', 'on_dropped', 'attempts')
+
+    def __init__(self, text, on_sent=None, on_dropped=None):
+        """Запоминает текст и обратные вызовы."""
+        self.text = text
+        self.on_sent = on_sent
+        self.on_dropped = on_dropped
+        self.attempts = 0
+
+    def sent(self, chat_id):
+        """Сообщает о доставке уведомления."""
+        self._call(self.on_sent, chat_id)
+
+    def drop(self, chat_id):
+        """Сообщает, что уведомление не будет доставлено."""
+        self._call(self.on_dropped, chat_id)
+
+    @staticmethod
+    def _call(callback, chat_id):
+        """Вызывает обработчик; его ошибка записывается в лог.
+
+        Иначе исключение, например «database is locked» при записи
+        состояния, остановило бы поток отправки со всей очередью.
+        """
+        if callback is None:
+            return
+        try:
+            callback()
+        except Exception as error:
+            count_error(error)
+            logging.error(
+                CALLBACK_FAILED.format(chat_id=chat_id, error=error),
+                extra={'chat_id': chat_id}
+            )
+
+
+class Parts:
+    """Итог доставки уведомления, разбитого на несколько сообщений.
+
+    on_sent вызывается после доставки всех частей, on_dropped — при
+    первом отказе от любой из них.
+    """
+
+    def __init__(self, count, on_sent=None, on_dropped=None):
+        """Ждёт доставки count частей."""
+        self._lock = threading.Lock()
+        self.remaining = count
+        self.dropped = False
+        self.on_sent = on_sent
+        self.on_dropped = on_dropped
+
+    def sent(self):
+        """Часть доставлена."""
+        with self._lock:
+            self.remaining -= 1
+            done = not self.remaining and not self.dropped
+        if done and self.on_sent is not None:
+            self.on_sent()
+
+    def drop(self):
+        """Часть не будет доставлена."""
+        with self._lock:
+            first, self.dropped = not self.dropped, True
+        if first and self.on_dropped is not None:
+            self.on_dropped()
+
+
+class Outbox:
+    """Очередь исходящих сообщений Telegram с ограничением скорости.
+
+    Общий лимит — ведро токенов на GLOBAL_SEND_RATE сообщений в секунду,
+    для каждого чата — не чаще CHAT_SEND_RATE. Уведомления, накопившиеся
+    для одного чата, уходят одним сообщением. Чаты ждут своей очереди в
+    куче по времени, когда им снова можно писать; RetryAfter от Telegram
+    переносит это время, и сообщение отправляется повторно.
+    """
+
+    def __init__(self, bot, global_rate=GLOBAL_SEND_RATE,
+                 chat_rate=CHAT_SEND_RATE, parse_mode=None):
+        """Создаёт пустую очередь для бота.
+
+        parse_mode — разметка текстов уведомлений, например 'MarkdownV2'.
+        """
+        self.bot = bot
+        self._send_options = {'parse_mode': parse_mode} if parse_mode else {}
+        self.chat_interval = 1 / chat_rate
+        self._bucket = TokenBucket(global_rate)
+        self._pending = {}
+        self._ready = []
+        self._counter = itertools.count()
+        self._next_allowed = {}
+        self._condition = threading.Condition()
+        self._sending = 0
+        self._threads = []
+
+    def put(self, chat_id, text, on_sent=None, on_dropped=None):
+        """Ставит уведомление в очередь чата.
+
+        on_sent вызывается после доставки, on_dropped — если сообщение
+        отброшено без доставки. Текст длиннее MAX_MESSAGE_LENGTH
+        делится на части (см. split_message).
+        """
+        parts = split_message(text)
+        if len(parts) == 1:
+            notices = [Notice(text, on_sent, on_dropped)]
+        else:
+            result = Parts(len(parts), on_sent, on_dropped)
+            notices = [
+                Notice(part, result.sent, result.drop) for part in parts
+            ]
+        with self._condition:
+            self._enqueue(chat_id, notices)
+            self._condition.notify_all()
+
+    def _enqueue(self, chat_id, notices, front=False):
+        """Добавляет уведомления чату и ставит чат в кучу готовности."""
+        pending = self._pending.get(chat_id)
+        if pending is None:
+            pending = self._pending[chat_id] = deque()
+            heapq.heappush(self._ready, (
+                self._next_allowed.get(chat_id, 0),
+                next(self._counter),
+                chat_id
+            ))
+        if front:
+            pending.extendleft(reversed(notices))
+        else:
+            pending.extend(notices)
+
+    def __len__(self):
+        """Количество уведомлений в очереди."""
+        with self._condition:
+            return sum(len(pending) for pending in self._pending.values())
+
+    def _take_batch(self, chat_id):
+        """Забирает уведомления чата, умещающиеся в одно сообщение.
+
+        Если что-то осталось, чат снова встаёт в кучу готовности.
+        """
+        pending = self._pending[chat_id]
+        batch = [pending.popleft()]
+        length = len(batch[0].text)
+        while pending and (
+            length + len(MESSAGES_SEPARATOR) + len(pending[0].text)
+            <= MAX_MESSAGE_LENGTH
+        ):
+            length += len(MESSAGES_SEPARATOR) + len(pending[0].text)
+            batch.append(pending.popleft())
+        if pending:
+            heapq.heappush(self._ready, (
+                self._next_allowed[chat_id],
+                next(self._counter),
+                chat_id
+            ))
+        else:
+            del self._pending[chat_id]
+        return batch
+
+    def _next_batch(self):
+        """Следующая пачка для отправки или пауза до неё."""
+        now = time.monotonic()
+        while self._ready:
+            ready_at, _, chat_id = self._ready[0]
+            allowed = self._next_allowed.get(chat_id, 0)
+            if allowed > ready_at:
+                heapq.heapreplace(
+                    self._ready,
+                    (allowed, next(self._counter), chat_id)
+                )
+                continue
+            delay = max(ready_at - now, self._bucket.delay(now))
+            if delay > 0:
+                return None, None, delay
+            heapq.heappop(self._ready)
+            self._bucket.take()
+            self._next_allowed[chat_id] = now + self.chat_interval
+            return chat_id, self._take_batch(chat_id), 0
+        return None, None, None
+
+    def _send(self, chat_id, batch):
+        """Отправляет пачку; при временной ошибке возвращает её в очередь."""
+        text = MESSAGES_SEPARATOR.join(notice.text for notice in batch)
+        try:
+            with SEND_LATENCY.time():
+                self.bot.send_message(chat_id, text, **self._send_options)
+        except RetryAfter as error:
+            count_error(error)
+            logging.warning(
+                FLOOD_LIMIT.format(chat_id=chat_id, delay=error.retry_after),
+                extra={'chat_id': chat_id}
+            )
+            self._retry(chat_id, batch, error.retry_after)
+            return
+        except (BadRequest, Unauthorized) as error:
+            count_error(error)
+            logging.error(
+                SEND_FAILED.format(chat_id=chat_id, error=error),
+                extra={'chat_id': chat_id}
+            )
+            for notice in batch:
+                notice.drop(chat_id)
+            return
+        except TelegramError as error:
+            count_error(error)
+            logging.error(
+                SEND_FAILED.format(chat_id=chat_id, error=error),
+                extra={'chat_id': chat_id}
+            )
+            self._retry_or_drop(chat_id, batch, error)
+            return
+        logging.debug(
+            MESSAGE_SENT.format(chat_id=chat_id, count=len(batch)),
+            extra={'chat_id': chat_id}
+        )
+        for notice in batch:
+            notice.sent(chat_id)
+
+    def _retry_or_drop(self, chat_id, batch, error):
+        """Повторяет пачку, отбрасывая исчерпавшие MAX_SEND_ATTEMPTS."""
+        retry = []
+        for notice in batch:
+            notice.attempts += 1
+            if notice.attempts < MAX_SEND_ATTEMPTS:
+                retry.append(notice)
+                continue
+            logging.error(
+                SEND_DROPPED.format(
+                    chat_id=chat_id,
+                    attempts=notice.attempts,
+                    error=error
+                ),
+                extra={'chat_id': chat_id}
+            )
+            notice.drop(chat_id)
+        if retry:
+            self._retry(chat_id, retry, self.chat_interval)
+
+    def _retry(self, chat_id, batch, delay):
+        """Возвращает пачку в начало очереди чата через delay секунд."""
+        with self._condition:
+            self._next_allowed[chat_id] = time.monotonic() + delay
+            self._enqueue(chat_id, batch, front=True)
+            self._condition.notify_all()
+
+    def drain(self, block=True):
+        """Отправляет накопленные сообщения в текущем потоке.
+
+        При block=False возвращается, как только очередь упирается
+        в лимит, иначе ждёт, пока очередь не опустеет.
+        """
+        while True:
+            with self._condition:
+                chat_id, batch, delay = self._next_batch()
+                if batch is None:
+                    if delay is None or not block:
+                        return
+                    self._condition.wait(delay)
+                    continue
+                self._sending += 1
+            try:
+                self._send(chat_id, batch)
+            finally:
+                with self._condition:
+                    self._sending -= 1
+                    self._condition.notify_all()
+
+    def _run(self):
+        """Цикл фонового потока отправки."""
+        while True:
+            with self._condition:
+                while not self._ready:
+                    self._condition.wait()
+            self.drain()
+
+    def start(self, workers=SEND_WORKERS):
+        """Запускает workers фоновых потоков отправки.
+
+        Потоки делят общие лимиты, но медленный ответ Telegram одному
+        чату не задерживает отправку в другие.
+        """
+        for _ in range(workers):
+            thread = threading.Thread(target=self._run, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def join(self, timeout=None):
+        """Ждёт, пока очередь не опустеет и отправки не завершатся."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while self._ready or self._sending:
+                remaining = (
+                    None if deadline is None else deadline - time.monotonic()
+                )
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+        return True
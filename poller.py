@@ -0,0 +1,579 @@
+from dotenv import load_dotenv
+
+if __name__ == '__main__':
+    # Настройки модулей читаются при импорте, поэтому .env — до них.
+    load_dotenv()
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+from collections import ChainMap
+from concurrent.futures import ThreadPoolExecutor, wait
+from functools import partial
+
+from alerts import PROGRAM_RECOVERED, ErrorNotifier
+from api_client import (CONNECTION_STATS, connection_stats,
+                        fetch_homework_statuses, forget_response)
+from bot_commands import BOT_COMMANDS, start_commands
+from cursors import advance_cursor, poll_from_date
+from exceptions import CircuitOpenError
+from homework import (MESSAGES_SEPARATOR, NOTHING_TO_CHECK, PROGRAM_FAILURE,
+                      RETRY_PERIOD, TELEGRAM_TOKEN, check_response,
+                      homework_key, parse_statuses, remember_statuses,
+                      select_new_statuses)
+from ingest import INGEST_PORT, start_ingest_server
+from log_config import setup_logging, tenant
+from metrics import (METRICS_PORT, OUTBOX_DEPTH, POLL_QUEUE_DEPTH,
+                     SCHEDULER_LAG, count_error, start_metrics_server)
+from outbox import SEND_WORKERS, Outbox
+from response_cache import NotChanged
+from scheduling import (POLL_JITTER, REVIEWING_PERIOD, PollQueue,
+                        next_poll_delay)
+from sharding import create_shard
+from sinks import create_fan_out
+from storage import open_state_store
+from subscriptions import SUBSCRIPTIONS_FILE, load_subscriptions
+from templates import NOTIFICATION_MARKUP, REVIEWER_COMMENTS, escape
+
+POLLER_MODE = os.getenv('POLLER_MODE', 'sync')
+POLL_CONCURRENCY = int(os.getenv('POLL_CONCURRENCY', 100))
+POLL_TIMEOUT = float(os.getenv('POLL_TIMEOUT', 120))
+RECONCILE_PERIOD = int(os.getenv('RECONCILE_PERIOD', 6 * RETRY_PERIOD))
+POLL_PERIOD = RECONCILE_PERIOD if INGEST_PORT else RETRY_PERIOD
+# Статусы на ревью присылает сервис, сверку чаще POLL_PERIOD не ускоряем.
+REVIEWING_POLL_PERIOD = (
+    max(REVIEWING_PERIOD, POLL_PERIOD) if INGEST_PORT else REVIEWING_PERIOD
+)
+MAX_TICK = 60
+
+POLLER_IS_WORKING = 'Опрос подписок запущен: {count}'
+NO_TELEGRAM_TOKEN = 'Переменная окружения отсутствует: TELEGRAM_TOKEN'
+NO_SUBSCRIPTIONS = 'Нет подписок для опроса'
+WORK_WAS_ENDED = 'Работа опросчика не осуществляется'
+RESPONSE_NOT_CHANGED = 'Ответ API не изменился'
+STATUS_DETECTED = 'Новый статус работы: {status}'
+POLL_TIMED_OUT = 'Опрос {count} подписок не уложился в {timeout} с'
+POLL_FAILED = 'Опрос подписки не завершён: {error}'
+
+error_notifier = ErrorNotifier()
+in_flight_lock = threading.Lock()
+
+
+def fetch_api_answer(subscription):
+    """Запрос к API с токеном подписки."""
+    return fetch_homework_statuses(
+        subscription.token,
+        poll_from_date(subscription.timestamp, time.time())
+    )
+
+
+def advance_subscription(subscription, store, current_date):
+    """Сдвигает курсор подписки и сохраняет его."""
+    subscription.timestamp = advance_cursor(
+        subscription.timestamp, current_date
+    )
+    store.save_cursor(subscription.token, subscription.timestamp)
+
+
+def notified_statuses(subscription, store):
+    """Отправленные статусы вместе с ещё не подтверждёнными."""
+    notified = store.load_statuses(subscription.token)
+    with in_flight_lock:
+        if subscription.in_flight:
+            return ChainMap(dict(subscription.in_flight), notified)
+    return notified
+
+
+def process_response(subscription, response, store):
+    """Работы с новым статусом и курсор для сдвига после их доставки.
+
+    Если сообщать нечего и у подписки нет недоставленных уведомлений,
+    курсор сдвигается сразу. Иначе он ждёт подтверждения доставки,
+    чтобы при сбое отправки работы пришли в следующем ответе снова.
+    """
+    if isinstance(response, NotChanged):
+        logging.debug(RESPONSE_NOT_CHANGED, extra=tenant(subscription.token))
+        new_homeworks, current_date = [], response.current_date
+    else:
+        current_date = response.get('current_date')
+        new_homeworks = select_new_statuses(
+            check_response(response),
+            notified_statuses(subscription, store)
+        )
+    if new_homeworks:
+        subscription.changed_at = time.time()
+        for homework in new_homeworks:
+            logging.debug(
+                STATUS_DETECTED.format(status=homework.get('status')),
+                extra=dict(
+                    tenant(subscription.token),
+                    homework=homework_key(homework)
+                )
+            )
+        return new_homeworks, current_date
+    if not isinstance(response, NotChanged):
+        logging.debug(NOTHING_TO_CHECK, extra=tenant(subscription.token))
+    if subscription.in_flight is None:
+        advance_subscription(subscription, store, current_date)
+    return new_homeworks, None
+
+
+def render_notification(homeworks):
+    """Текст статусов в разметке Telegram и тот же текст без разметки."""
+    text = parse_statuses(
+        homeworks, markup=NOTIFICATION_MARKUP, comments=REVIEWER_COMMENTS
+    )
+    if NOTIFICATION_MARKUP is None:
+        return text, text
+    return text, parse_statuses(homeworks, comments=REVIEWER_COMMENTS)
+
+
+def failure_notification(subscription, error):
+    """Уведомление о сбое: текст, работы, курсор и текст без разметки.
+
+    Работ нет, курсор None. Ответ забывается в кеше, чтобы тот же
+    непрошедший проверку ответ не был принят за неизменившийся.
+    Повторы того же сбоя и время, пока размыкатель не пускает
+    запросы, в чат не сообщаются.
+    """
+    count_error(error)
+    forget_response(subscription.token)
+    if isinstance(error, CircuitOpenError):
+        logging.warning(error, extra=tenant(subscription.token))
+        return None, [], None, None
+    message = PROGRAM_FAILURE.format(error=error)
+    logging.error(message, extra=tenant(subscription.token))
+    if not error_notifier.should_notify(subscription.token, error):
+        return None, [], None, None
+    return escape(message, NOTIFICATION_MARKUP), [], None, message
+
+
+def build_notification(subscription, response, store):
+    """Уведомление: текст, работы, курсор и текст без разметки.
+
+    Курсор сдвигается по доставке, текст без разметки получают
+    адреса вне Telegram.
+    """
+    try:
+        homeworks, current_date = process_response(
+            subscription, response, store
+        )
+        message, plain = (
+            render_notification(homeworks) if homeworks else (None, None)
+        )
+    except Exception as error:
+        return failure_notification(subscription, error)
+    if error_notifier.recovered(subscription.token):
+        message = MESSAGES_SEPARATOR.join(
+            filter(None, (escape(PROGRAM_RECOVERED, NOTIFICATION_MARKUP),
+                          message))
+        )
+        plain = MESSAGES_SEPARATOR.join(
+            filter(None, (PROGRAM_RECOVERED, plain))
+        )
+    return message, homeworks, current_date, plain
+
+
+def acknowledge(store, subscription, homeworks, current_date, forward=None):
+    """После доставки: рассылает копии, запоминает статусы и сдвигает курсор.
+
+    forward() ставит копии в очереди дополнительных адресов.
+    """
+    if forward is not None:
+        forward()
+    remember_statuses(store, subscription.token, homeworks)
+    settle(subscription, homeworks)
+    advance_subscription(subscription, store, current_date)
+    store.commit()
+
+
+def release(subscription, homeworks):
+    """После отказа от доставки: работы снова считаются новыми.
+
+    Курсор не сдвигался, а ответ забывается в кеше, поэтому следующий
+    опрос разберёт работы заново и отправит их ещё раз.
+    """
+    settle(subscription, homeworks)
+    forget_response(subscription.token)
+
+
+def settle(subscription, homeworks):
+    """Убирает работы из неподтверждённых статусов подписки."""
+    with in_flight_lock:
+        in_flight = subscription.in_flight or {}
+        for homework in homeworks:
+            key = homework_key(homework)
+            if in_flight.get(key) == homework.get('status'):
+                del in_flight[key]
+        subscription.in_flight = in_flight or None
+
+
+def deliver(outbox, subscription, store, message, homeworks,
+            current_date=None, plain=None):
+    """Ставит уведомление в очередь.
+
+    Статусы запоминаются, а курсор сдвигается на current_date только
+    после доставки в чат подписки. Тогда же копию получают
+    дополнительные адреса, вне Telegram — текст plain без разметки:
+    повторная отправка после отказа не дублирует им уведомление.
+    """
+    if not message:
+        return
+    on_sent = on_dropped = None
+    if subscription.destinations:
+        on_sent = partial(
+            outbox.forward, subscription.destinations, message, plain
+        )
+    if homeworks:
+        with in_flight_lock:
+            if subscription.in_flight is None:
+                subscription.in_flight = {}
+            for homework in homeworks:
+                subscription.in_flight[homework_key(homework)] = (
+                    homework.get('status')
+                )
+        on_sent = partial(
+            acknowledge, store, subscription, homeworks, current_date, on_sent
+        )
+        on_dropped = partial(release, subscription, homeworks)
+    outbox.put(subscription.chat_id, message, on_sent, on_dropped)
+
+
+def schedule_next_poll(subscription, store):
+    """Назначает время следующего опроса подписки, если она не удалена."""
+    if subscription.removed:
+        return
+    now = time.time()
+    subscription.next_poll = now + next_poll_delay(
+        POLL_PERIOD,
+        store.has_reviewing(subscription.token),
+        now - subscription.changed_at,
+        POLL_JITTER,
+        REVIEWING_POLL_PERIOD
+    )
+
+
+def poll_subscription(outbox, subscription, store):
+    """Один цикл опроса API и уведомления для подписки."""
+    try:
+        response = fetch_api_answer(subscription)
+    except Exception as error:
+        notification = failure_notification(subscription, error)
+    else:
+        notification = build_notification(subscription, response, store)
+    deliver(outbox, subscription, store, *notification)
+    schedule_next_poll(subscription, store)
+    store.commit()
+
+
+def handle_pushed_event(outbox, registry, store, token, payload):
+    """Отправляет новые статусы из присланного события.
+
+    Курсор подписки не меняется: current_date присылает не API, а
+    контрольный опрос должен найти и изменения, о которых не сообщили.
+    """
+    subscription = registry.get(token)
+    if subscription is None:
+        return False
+    homeworks = select_new_statuses(
+        check_response(payload), notified_statuses(subscription, store)
+    )
+    if homeworks:
+        subscription.changed_at = time.time()
+        message, plain = render_notification(homeworks)
+        deliver(outbox, subscription, store, message, homeworks, plain=plain)
+    store.commit()
+    return True
+
+
+def poll_all(outbox, registry, store):
+    """Опрашивает все подписки реестра."""
+    for subscription in registry:
+        poll_subscription(outbox, subscription, store)
+
+
+def claim_subscription(subscription, store, shard=None):
+    """Достаётся ли подписка этому процессу для опроса.
+
+    Без деления — всегда. При делении токен должен принадлежать шарду
+    по кольцу и быть захвачен им в общей базе: пока воркеры по-разному
+    видят кольцо, опрашивает только держатель захвата. Курсор своей
+    подписки читается из базы: его мог сдвинуть другой процесс.
+    """
+    if shard is None:
+        return True
+    if not shard.owns(subscription.token):
+        return False
+    if not store.claim(subscription.token, shard.worker_id):
+        return False
+    subscription.timestamp = advance_cursor(
+        subscription.timestamp,
+        store.load_cursor(subscription.token)
+    )
+    return True
+
+
+def poll_if_claimed(outbox, subscription, store, shard=None):
+    """Опрашивает подписку сразу, если она достаётся этому процессу."""
+    if claim_subscription(subscription, store, shard):
+        poll_subscription(outbox, subscription, store)
+
+
+def pop_owned_due(queue, store, shard=None):
+    """Подошедшие подписки своего шарда.
+
+    Чужие подписки откладываются на период опроса: если после
+    перебалансировки они достанутся этому шарду, опрос начнётся с ними.
+    Их статусы выгружаются из памяти.
+    """
+    now = time.time()
+    owned = []
+    for subscription in queue.pop_due(now):
+        if claim_subscription(subscription, store, shard):
+            SCHEDULER_LAG.observe(now - subscription.next_poll)
+            owned.append(subscription)
+        else:
+            subscription.next_poll = now + POLL_PERIOD
+            store.forget_statuses(subscription.token)
+            queue.push(subscription)
+    return owned
+
+
+def poll_due(outbox, queue, store, shard=None):
+    """Опрашивает подписки, которым подошло время опроса."""
+    for subscription in pop_owned_due(queue, store, shard):
+        poll_subscription(outbox, subscription, store)
+        queue.push(subscription)
+
+
+def seconds_until_next_poll(queue):
+    """Сколько ждать до ближайшего опроса, но не дольше MAX_TICK.
+
+    Ограничение нужно, чтобы подписки, добавленные командами бота,
+    не ждали окончания долгой паузы.
+    """
+    next_poll = queue.next_due()
+    if next_poll is None:
+        return MAX_TICK
+    return min(max(0, next_poll - time.time()), MAX_TICK)
+
+
+def create_queue(registry):
+    """Очередь опросов со всеми подписками реестра."""
+    queue = PollQueue()
+    for subscription in registry:
+        queue.push(subscription)
+    return queue
+
+
+async def poll_subscription_async(outbox, subscription, store, semaphore):
+    """Асинхронный цикл опроса подписки под общим семафором.
+
+    Весь опрос идёт в потоке: не только запрос к API, но и запись в
+    базу, которая может ждать блокировки до STATE_DB_TIMEOUT секунд и
+    иначе остановила бы цикл событий. Ошибка одной подписки только
+    записывается в лог и не срывает опрос остальных.
+    """
+    async with semaphore:
+        try:
+            await asyncio.to_thread(
+                poll_subscription, outbox, subscription, store
+            )
+        except Exception as error:
+            count_error(error)
+            logging.error(
+                POLL_FAILED.format(error=error),
+                extra=tenant(subscription.token)
+            )
+
+
+async def poll_due_async(outbox, queue, store, concurrency=POLL_CONCURRENCY,
+                         shard=None):
+    """Опрашивает подошедшие подписки параллельно, до concurrency за раз."""
+    due = await asyncio.to_thread(pop_owned_due, queue, store, shard)
+    semaphore = asyncio.Semaphore(concurrency)
+    await asyncio.gather(*(
+        poll_subscription_async(outbox, subscription, store, semaphore)
+        for subscription in due
+    ))
+    for subscription in due:
+        queue.push(subscription)
+
+
+def poll_finished(queue, slots, subscription, future):
+    """Возвращает подписку в очередь и освобождает место в пуле."""
+    slots.release()
+    queue.push(subscription)
+
+
+def poll_due_threads(outbox, queue, store, executor, slots, shard=None,
+                     timeout=POLL_TIMEOUT):
+    """Опрашивает подошедшие подписки в пуле потоков.
+
+    slots ограничивает число задач в пуле: когда мест нет, раздача ждёт,
+    а не копит задачи в очереди исполнителя. Задачи, не завершившиеся
+    за timeout секунд, дорабатывают в фоне, а цикл идёт дальше; подписка
+    вернётся в очередь только после завершения своей задачи.
+    """
+    futures = []
+    for subscription in pop_owned_due(queue, store, shard):
+        slots.acquire()
+        future = executor.submit(
+            poll_subscription, outbox, subscription, store
+        )
+        future.add_done_callback(
+            partial(poll_finished, queue, slots, subscription)
+        )
+        futures.append(future)
+    if not futures:
+        return
+    _, not_done = wait(futures, timeout)
+    if not_done:
+        logging.warning(
+            POLL_TIMED_OUT.format(count=len(not_done), timeout=timeout)
+        )
+
+
+def log_connection_stats():
+    """Пишет в лог долю переиспользованных соединений."""
+    logging.debug(CONNECTION_STATS.format(**connection_stats()._asdict()))
+
+
+def refresh_shard(shard, sync=None):
+    """Продлевает участие шарда и подхватывает смену состава воркеров.
+
+    sync() сверяет подписки с общей базой: их могли оформить командами
+    бота в другом процессе.
+    """
+    if shard is not None:
+        shard.refresh()
+        if sync is not None:
+            sync()
+
+
+async def run_async(outbox, queue, store, shard=None, sync=None):
+    """Бесконечный асинхронный цикл опроса."""
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=POLL_CONCURRENCY)
+    )
+    while True:
+        await asyncio.to_thread(refresh_shard, shard, sync)
+        await poll_due_async(outbox, queue, store, shard=shard)
+        await asyncio.to_thread(store.commit)
+        log_connection_stats()
+        await asyncio.sleep(seconds_until_next_poll(queue))
+
+
+def restore_subscriptions(registry, store):
+    """Добавляет подписки, оформленные командами бота; возвращает токены."""
+    subscriptions = store.load_subscriptions()
+    for token, chat_id in subscriptions.items():
+        if token not in registry:
+            registry.add(token, chat_id)
+    return set(subscriptions)
+
+
+def sync_subscriptions(registry, queue, store, synced):
+    """Сверяет реестр с подписками команд бота в общей базе.
+
+    synced — токены таблицы подписок при прошлой сверке; отменённые
+    с тех пор подписки снимаются с опроса, новые или переехавшие в
+    другой чат ставятся в очередь с курсором из базы. synced
+    обновляется на месте.
+    """
+    subscriptions = store.load_subscriptions()
+    for token in synced - subscriptions.keys():
+        registry.remove(token)
+    for token, chat_id in subscriptions.items():
+        subscription = registry.get(token)
+        if subscription is None or str(subscription.chat_id) != chat_id:
+            queue.push(
+                registry.add(token, chat_id, store.load_cursor(token))
+            )
+    synced.clear()
+    synced.update(subscriptions)
+
+
+def restore_cursors(registry, store):
+    """Возвращает подпискам курсоры, сохранённые до перезапуска."""
+    cursors = store.load_cursors()
+    for subscription in registry:
+        subscription.timestamp = cursors.get(
+            subscription.token,
+            subscription.timestamp
+        )
+
+
+def main():
+    """Опрос всех подписок одним процессом."""
+    if TELEGRAM_TOKEN is None:
+        logging.critical(NO_TELEGRAM_TOKEN)
+        sys.exit(WORK_WAS_ENDED)
+    store = open_state_store()
+    registry = load_subscriptions(SUBSCRIPTIONS_FILE)
+    synced = restore_subscriptions(registry, store)
+    if not registry and not BOT_COMMANDS:
+        logging.critical(NO_SUBSCRIPTIONS)
+        sys.exit(WORK_WAS_ENDED)
+    logging.info(POLLER_IS_WORKING.format(count=len(registry)))
+    restore_cursors(registry, store)
+    queue = create_queue(registry)
+    import telegram
+    from telegram.utils.request import Request
+
+    bot = telegram.Bot(
+        token=TELEGRAM_TOKEN,
+        request=Request(con_pool_size=SEND_WORKERS + 4)
+    )
+    outbox = Outbox(bot, parse_mode=NOTIFICATION_MARKUP)
+    notifier = create_fan_out(outbox).start()
+    if METRICS_PORT:
+        POLL_QUEUE_DEPTH.set_function(queue.__len__)
+        OUTBOX_DEPTH.set_function(outbox.__len__)
+        start_metrics_server()
+    if INGEST_PORT:
+        start_ingest_server(
+            partial(handle_pushed_event, notifier, registry, store)
+        )
+    shard = create_shard()
+    sync = partial(sync_subscriptions, registry, queue, store, synced)
+    if BOT_COMMANDS:
+        start_commands(
+            TELEGRAM_TOKEN,
+            registry,
+            queue,
+            store,
+            partial(poll_if_claimed, notifier, store=store, shard=shard)
+        )
+    try:
+        if POLLER_MODE == 'async':
+            return asyncio.run(
+                run_async(notifier, queue, store, shard, sync)
+            )
+        if POLLER_MODE == 'threads':
+            executor = ThreadPoolExecutor(max_workers=POLL_CONCURRENCY)
+            poll = partial(
+                poll_due_threads,
+                executor=executor,
+                slots=threading.BoundedSemaphore(2 * POLL_CONCURRENCY)
+            )
+        else:
+            poll = poll_due
+        while True:
+            refresh_shard(shard, sync)
+            poll(notifier, queue, store, shard=shard)
+            store.commit()
+            log_connection_stats()
+            time.sleep(seconds_until_next_poll(queue))
+    finally:
+        if shard is not None:
+            store.release_claims(shard.worker_id)
+            shard.leave()
+
+
+if __name__ == '__main__':
+    setup_logging(logging.getLogger())
+    main()
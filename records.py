@@ -0,0 +1,77 @@
+from collections.abc import Mapping
+from enum import Enum
+
+
+class Status(Enum):
+    """Статус проверки работы; значения совпадают с ключами вердиктов."""
+
+    APPROVED = 'approved'
+    REVIEWING = 'reviewing'
+    REJECTED = 'rejected'
+
+
+class StatusView(Mapping):
+    """Статусы токена только для чтения: работа → строка статуса.
+
+    Обёртка над записями таблицы без копирования: опрос читает статусы
+    дважды за цикл, и новый словарь на каждое чтение свёл бы выигрыш
+    таблицы на нет.
+    """
+
+    __slots__ = ('_records',)
+
+    def __init__(self, records):
+        """Оборачивает записи работа → Status."""
+        self._records = records
+
+    def __getitem__(self, homework):
+        """Строка статуса работы."""
+        return self._records[homework].value
+
+    def __iter__(self):
+        """Обход снимка работ: таблицу могут дополнять из другого потока."""
+        return iter(list(self._records))
+
+    def __len__(self):
+        """Количество работ."""
+        return len(self._records)
+
+
+class StatusTable:
+    """Последние известные статусы работ по токенам в памяти.
+
+    Для каждой работы хранится только ссылка на общий член Status, а
+    ключ работы — ключ словаря, поэтому отдельных объектов на работу
+    не создаётся. Токен попадает в таблицу целиком через load(); set()
+    обновляет только загруженные токены, чтобы таблица не выдавала
+    неполные данные.
+    """
+
+    def __init__(self):
+        """Создаёт пустую таблицу."""
+        self._tokens = {}
+
+    def get(self, token):
+        """Записи токена: работа → Status, или None."""
+        return self._tokens.get(token)
+
+    def load(self, token, rows):
+        """Заполняет записи токена парами (работа, статус)."""
+        records = self._tokens[token] = {
+            homework: Status(status) for homework, status in rows
+        }
+        return records
+
+    def set(self, token, homework, status):
+        """Обновляет статус работы загруженного токена."""
+        records = self._tokens.get(token)
+        if records is not None:
+            records[homework] = Status(status)
+
+    def forget(self, token):
+        """Выгружает токен из таблицы."""
+        self._tokens.pop(token, None)
+
+    def __len__(self):
+        """Количество работ в таблице."""
+        return sum(len(records) for records in self._tokens.values())
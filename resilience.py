@@ -0,0 +1,97 @@
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from http import HTTPStatus
+
+from exceptions import CircuitOpenError
+
+RETRY_ATTEMPTS = int(os.getenv('RETRY_ATTEMPTS', 3))
+RETRY_BASE_DELAY = float(os.getenv('RETRY_BASE_DELAY', 1))
+RETRY_MAX_DELAY = float(os.getenv('RETRY_MAX_DELAY', 30))
+FAILURE_THRESHOLD = int(os.getenv('FAILURE_THRESHOLD', 5))
+RESET_TIMEOUT = float(os.getenv('RESET_TIMEOUT', 60))
+
+RETRY_STATUSES = frozenset((
+    HTTPStatus.TOO_MANY_REQUESTS,
+    HTTPStatus.BAD_GATEWAY,
+    HTTPStatus.SERVICE_UNAVAILABLE,
+    HTTPStatus.GATEWAY_TIMEOUT,
+))
+CIRCUIT_IS_OPEN = 'Запросы к API приостановлены ещё на {seconds:.0f} с'
+
+
+def backoff_delay(attempt, base=RETRY_BASE_DELAY, limit=RETRY_MAX_DELAY):
+    """Пауза перед повтором: экспонента с полным случайным разбросом."""
+    return random.uniform(0, min(limit, base * 2 ** attempt))
+
+
+def retry_after(response):
+    """Значение заголовка Retry-After в секундах или None."""
+    value = response.headers.get('Retry-After')
+    if value is None:
+        return None
+    if value.strip().isdigit():
+        return float(value)
+    try:
+        return max(0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class CircuitBreaker:
+    """Размыкатель: после череды сбоев не пускает запросы к API.
+
+    После FAILURE_THRESHOLD сбоев подряд цепь размыкается на
+    RESET_TIMEOUT секунд. Затем пропускается один пробный запрос:
+    успех замыкает цепь, сбой снова размыкает.
+    """
+
+    def __init__(self, threshold=FAILURE_THRESHOLD,
+                 reset_timeout=RESET_TIMEOUT):
+        """Создаёт замкнутую цепь."""
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_until = 0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self):
+        """Разомкнута ли цепь сейчас."""
+        return self.opened_until > time.time()
+
+    def before_call(self):
+        """Пропускает запрос или бросает CircuitOpenError."""
+        with self._lock:
+            now = time.time()
+            if self.opened_until > now:
+                raise CircuitOpenError(
+                    CIRCUIT_IS_OPEN.format(seconds=self.opened_until - now)
+                )
+            if self.failures >= self.threshold:
+                if self._probing:
+                    raise CircuitOpenError(CIRCUIT_IS_OPEN.format(seconds=0))
+                self._probing = True
+
+    def record_success(self):
+        """Запрос удался: цепь замыкается."""
+        with self._lock:
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        """Запрос не удался: при превышении порога цепь размыкается."""
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.failures >= self.threshold:
+                self.opened_until = time.time() + self.reset_timeout
+
+    def open_for(self, seconds):
+        """Размыкает цепь на заданное время, например по Retry-After."""
+        with self._lock:
+            self.failures = max(self.failures, self.threshold)
+            self.opened_until = max(self.opened_until, time.time() + seconds)
@@ -0,0 +1,102 @@
+import re
+from collections import namedtuple
+from hashlib import blake2b
+from http import HTTPStatus
+
+CURRENT_DATE_FIELD = re.compile(rb'"current_date"\s*:\s*(\d+)')
+
+NotChanged = namedtuple('NotChanged', ('current_date',))
+
+
+class CacheEntry:
+    """Сведения о последнем ответе API для токена."""
+
+    __slots__ = ('etag', 'last_modified', 'digest', 'current_date')
+
+    def __init__(self, etag, last_modified, digest, current_date):
+        """Запоминает валидаторы, хеш тела ответа и его current_date."""
+        self.etag = etag
+        self.last_modified = last_modified
+        self.digest = digest
+        self.current_date = current_date
+
+
+def body_digest(content):
+    """Хеш тела ответа без поля current_date, которое меняется всегда."""
+    return blake2b(
+        CURRENT_DATE_FIELD.sub(b'', content),
+        digest_size=16
+    ).digest()
+
+
+def body_current_date(content):
+    """current_date из тела ответа без разбора JSON или None."""
+    match = CURRENT_DATE_FIELD.search(content)
+    return int(match.group(1)) if match else None
+
+
+class ResponseCache:
+    """Кеш ответов API по токену.
+
+    Хранит по одной запись на токен: отправляет If-None-Match и
+    If-Modified-Since и сравнивает хеш тела без current_date, чтобы не
+    разбирать JSON неизменившегося ответа. from_date в ключ не входит:
+    курсор сдвигается после каждого ответа, и с ним кеш бы не срабатывал.
+    """
+
+    def __init__(self):
+        """Создаёт пустой кеш."""
+        self._entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    def conditional_headers(self, token):
+        """Заголовки условного запроса для токена."""
+        entry = self._entries.get(token)
+        if entry is None:
+            return {}
+        headers = {}
+        if entry.etag:
+            headers['If-None-Match'] = entry.etag
+        if entry.last_modified:
+            headers['If-Modified-Since'] = entry.last_modified
+        return headers
+
+    def check(self, token, response):
+        """NotChanged(current_date), если ответ совпадает с закешированным.
+
+        Иначе обновляет запись и возвращает None. Для 304 current_date
+        берётся из прошлого ответа, для 200 — из тела регулярным
+        выражением.
+        """
+        entry = self._entries.get(token)
+        if response.status_code == HTTPStatus.NOT_MODIFIED:
+            if entry is None:
+                return None
+            self.hits += 1
+            return NotChanged(entry.current_date)
+        if response.status_code != HTTPStatus.OK:
+            return None
+        digest = body_digest(response.content)
+        current_date = body_current_date(response.content)
+        if entry is not None and entry.digest == digest:
+            self.hits += 1
+            if current_date is not None:
+                entry.current_date = current_date
+            return NotChanged(entry.current_date)
+        self.misses += 1
+        self._entries[token] = CacheEntry(
+            response.headers.get('ETag'),
+            response.headers.get('Last-Modified'),
+            digest,
+            current_date
+        )
+        return None
+
+    def discard(self, token):
+        """Забывает ответ токена."""
+        self._entries.pop(token, None)
+
+    def __len__(self):
+        """Количество токенов в кеше."""
+        return len(self._entries)
@@ -0,0 +1,91 @@
+import heapq
+import itertools
+import os
+import random
+import threading
+
+REVIEWING_PERIOD = int(os.getenv('REVIEWING_PERIOD', 120))
+IDLE_PERIOD = int(os.getenv('IDLE_PERIOD', 3 * 60 * 60))
+MAX_RETRY_PERIOD = int(os.getenv('MAX_RETRY_PERIOD', 2 * 60 * 60))
+POLL_JITTER = float(os.getenv('POLL_JITTER', 0.1))
+
+
+def next_poll_delay(period, reviewing, idle, jitter=0,
+                    reviewing_period=REVIEWING_PERIOD):
+    """Пауза до следующего опроса токена при обычной паузе period.
+
+    Пока работа на ревью, опрашиваем раз в reviewing_period. Если
+    статусы не менялись дольше IDLE_PERIOD, пауза удваивается за каждый
+    такой период, но не превышает MAX_RETRY_PERIOD. jitter разносит
+    опросы разных токенов во времени.
+    """
+    if reviewing:
+        delay = reviewing_period
+    elif idle < IDLE_PERIOD:
+        delay = period
+    else:
+        delay = min(
+            period * 2 ** int(idle // IDLE_PERIOD),
+            MAX_RETRY_PERIOD
+        )
+    if jitter:
+        delay *= random.uniform(1 - jitter, 1 + jitter)
+    return delay
+
+
+class PollQueue:
+    """Очередь опросов подписок на min-куче по next_poll.
+
+    Перенос опроса не ищет старую запись: в кучу кладётся новая, а
+    устаревшая пропускается при извлечении, если её время уже не
+    совпадает с next_poll подписки. Поэтому постановка и перенос
+    стоят O(log N), а каждый тик трогает только подошедшие подписки.
+    """
+
+    def __init__(self):
+        """Создаёт пустую очередь."""
+        self._heap = []
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    def push(self, subscription):
+        """Ставит подписку в очередь на время subscription.next_poll.
+
+        Удалённая из реестра подписка не ставится: её опрос мог идти
+        в момент удаления, и после него она не должна вернуться.
+        """
+        if subscription.removed:
+            return
+        with self._lock:
+            heapq.heappush(
+                self._heap,
+                (subscription.next_poll, next(self._counter), subscription)
+            )
+
+    def _drop_stale(self):
+        """Убирает с вершины кучи устаревшие записи."""
+        heap = self._heap
+        while heap and heap[0][2].next_poll != heap[0][0]:
+            heapq.heappop(heap)
+
+    def pop_due(self, now):
+        """Извлекает подписки, время опроса которых не позже now."""
+        due = {}
+        heap = self._heap
+        with self._lock:
+            self._drop_stale()
+            while heap and heap[0][0] <= now:
+                subscription = heapq.heappop(heap)[2]
+                due[id(subscription)] = subscription
+                self._drop_stale()
+        return list(due.values())
+
+    def next_due(self):
+        """Время ближайшего опроса или None, если очередь пуста."""
+        with self._lock:
+            self._drop_stale()
+            return self._heap[0][0] if self._heap else None
+
+    def __len__(self):
+        """Количество записей в куче, включая устаревшие."""
+        return len(self._heap)
@@ -0,0 +1,63 @@
+import json
+from collections import namedtuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+Field = namedtuple(
+    'Field',
+    ('name', 'types', 'missing', 'invalid', 'choices', 'unexpected'),
+    defaults=(None, None)
+)
+
+
+def loads(content):
+    """Разбирает JSON: через orjson, если он установлен."""
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+def compile_schema(name, fields, not_mapping):
+    """Собирает проверку словаря по описанию полей.
+
+    Описание разбирается один раз; возвращаемая функция validate(data)
+    проверяет наличие, тип и допустимые значения полей за один проход
+    и возвращает запись namedtuple name с полями в порядке описания.
+    Отсутствующее поле — KeyError(missing), неверный тип — TypeError,
+    недопустимое значение — ValueError; не словарь — TypeError(not_mapping).
+    """
+    record = namedtuple(name, [field.name for field in fields])
+    checks = tuple(
+        (
+            field.name,
+            field.types,
+            field.missing,
+            field.invalid,
+            None if field.choices is None else frozenset(field.choices),
+            field.unexpected
+        )
+        for field in fields
+    )
+    make = tuple.__new__
+
+    def validate(data):
+        if not isinstance(data, dict):
+            raise TypeError(not_mapping)
+        values = []
+        for key, types, missing, invalid, choices, unexpected in checks:
+            try:
+                value = data[key]
+            except KeyError:
+                raise KeyError(missing) from None
+            if not isinstance(value, types):
+                raise TypeError(invalid.format(value=value))
+            if choices is not None and value not in choices:
+                raise ValueError(unexpected.format(value=value))
+            values.append(value)
+        return make(record, values)
+
+    validate.record = record
+    return validate
@@ -0,0 +1,144 @@
+import bisect
+import logging
+import os
+import socket
+import sqlite3
+import time
+from hashlib import md5
+
+SHARD_COUNT = int(os.getenv('SHARD_COUNT', 0))
+SHARD_INDEX = os.getenv('SHARD_INDEX')
+SHARD_DB = os.getenv('SHARD_DB')
+WORKER_TTL = int(os.getenv('WORKER_TTL', 180))
+VIRTUAL_NODES = 64
+
+SHARD_CHANGED = 'Состав воркеров изменился: {workers}'
+BAD_SHARD_INDEX = 'Номер шарда {index} вне диапазона 0..{last}'
+
+WORKERS_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS workers (
+    worker_id TEXT PRIMARY KEY,
+    heartbeat REAL NOT NULL
+)
+'''
+
+
+def key_hash(key):
+    """Положение ключа на кольце."""
+    return int.from_bytes(md5(key.encode()).digest()[:8], 'big')
+
+
+class HashRing:
+    """Кольцо консистентного хеширования с виртуальными узлами.
+
+    При добавлении или уходе узла переезжает только ~1/N токенов.
+    """
+
+    def __init__(self, nodes, vnodes=VIRTUAL_NODES):
+        """Раскладывает vnodes точек каждого узла по кольцу."""
+        points = sorted(
+            (key_hash(f'{node}#{number}'), node)
+            for node in nodes
+            for number in range(vnodes)
+        )
+        self._hashes = [point for point, _ in points]
+        self._nodes = [node for _, node in points]
+
+    def owner(self, key):
+        """Узел, отвечающий за ключ, или None для пустого кольца."""
+        if not self._hashes:
+            return None
+        index = bisect.bisect(self._hashes, key_hash(key))
+        return self._nodes[index % len(self._nodes)]
+
+
+class StaticShard:
+    """Шард с номером index из count, заданными при запуске."""
+
+    def __init__(self, index, count):
+        """Строит кольцо из count шардов."""
+        if not 0 <= index < count:
+            raise ValueError(
+                BAD_SHARD_INDEX.format(index=index, last=count - 1)
+            )
+        self.worker_id = f'shard-{index}'
+        self._ring = HashRing(f'shard-{number}' for number in range(count))
+
+    def refresh(self):
+        """Состав шардов не меняется."""
+
+    def owns(self, token):
+        """Отвечает ли шард за токен."""
+        return self._ring.owner(token) == self.worker_id
+
+    def leave(self):
+        """Статическому шарду нечего освобождать."""
+
+
+class WorkerMembership:
+    """Динамический состав воркеров через общий файл SQLite.
+
+    Каждый воркер раз в тик обновляет свой heartbeat; воркеры, молчащие
+    дольше ttl, выпадают из кольца, и их токены забирают остальные.
+    """
+
+    def __init__(self, path, worker_id=None, ttl=WORKER_TTL):
+        """Регистрирует воркер и строит кольцо из живых воркеров."""
+        self.worker_id = worker_id or f'{socket.gethostname()}:{os.getpid()}'
+        self.ttl = ttl
+        self._connection = sqlite3.connect(path, timeout=30)
+        self._connection.execute(WORKERS_SCHEMA)
+        self._workers = ()
+        self._ring = HashRing(())
+        self.refresh()
+
+    def refresh(self):
+        """Продлевает heartbeat и перестраивает кольцо при смене состава."""
+        now = time.time()
+        with self._connection:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO workers VALUES (?, ?)',
+                (self.worker_id, now)
+            )
+            self._connection.execute(
+                'DELETE FROM workers WHERE heartbeat < ?',
+                (now - self.ttl,)
+            )
+            workers = tuple(sorted(
+                worker for worker, in self._connection.execute(
+                    'SELECT worker_id FROM workers'
+                )
+            ))
+        if workers != self._workers:
+            logging.info(SHARD_CHANGED.format(workers=', '.join(workers)))
+            self._workers = workers
+            self._ring = HashRing(workers)
+
+    def owns(self, token):
+        """Отвечает ли воркер за токен."""
+        return self._ring.owner(token) == self.worker_id
+
+    def leave(self):
+        """Снимает воркер с учёта, чтобы его токены сразу переехали."""
+        with self._connection:
+            self._connection.execute(
+                'DELETE FROM workers WHERE worker_id = ?',
+                (self.worker_id,)
+            )
+        self._connection.close()
+
+
+def shard_index():
+    """Номер шарда из SHARD_INDEX или из имени dyno вида «poller.3»."""
+    if SHARD_INDEX is not None:
+        return int(SHARD_INDEX)
+    return int(os.getenv('DYNO', 'poller.1').rpartition('.')[2]) - 1
+
+
+def create_shard():
+    """Шард процесса по настройкам окружения или None без шардирования."""
+    if SHARD_COUNT:
+        return StaticShard(shard_index(), SHARD_COUNT)
+    if SHARD_DB:
+        return WorkerMembership(SHARD_DB)
+    return None
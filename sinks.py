@@ -0,0 +1,257 @@
+import abc
+import logging
+import os
+import queue
+import sys
+import threading
+
+from metrics import count_error
+
+SINK_QUEUE_SIZE = int(os.getenv('SINK_QUEUE_SIZE', 1000))
+SMTP_HOST = os.getenv('SMTP_HOST', 'localhost')
+SMTP_PORT = int(os.getenv('SMTP_PORT', 25))
+SMTP_SENDER = os.getenv('SMTP_SENDER', 'homework-bot@localhost')
+SINK_TIMEOUT = float(os.getenv('SINK_TIMEOUT', 10))
+
+NOTIFICATION_SUBJECT = 'Статус проверки домашней работы'
+SINK_OVERFLOW = ('Очередь {sink} переполнена, уведомление для '
+                 '{destination} отброшено')
+SINK_FAILED = '{sink}: уведомление для {destination} не доставлено: {error}'
+UNKNOWN_DESTINATION = 'Неизвестный адрес уведомлений: {destination}'
+
+
+def scheme(destination):
+    """Вид адреса: 'tg', 'mailto', 'http', 'https' или 'stdout'.
+
+    Число без префикса, например «-100123», — chat_id Telegram.
+    """
+    if destination.lstrip('-').isdigit():
+        return 'tg'
+    return destination.partition(':')[0].lower()
+
+
+class Sink(abc.ABC):
+    """Получатель уведомлений с ограниченной очередью и своим потоком.
+
+    put() не ждёт: при переполненной очереди уведомление отбрасывается,
+    поэтому медленный получатель не задерживает опрос и других
+    получателей. Наследники определяют send().
+    """
+
+    def __init__(self, maxsize=SINK_QUEUE_SIZE):
+        """Создаёт пустую очередь; поток запускает start()."""
+        self._queue = queue.Queue(maxsize)
+        self._thread = None
+
+    @abc.abstractmethod
+    def send(self, destination, text):
+        """Доставляет текст по адресу; ошибка — исключение."""
+
+    def put(self, destination, text, on_sent=None):
+        """Ставит уведомление в очередь; on_sent — после доставки."""
+        try:
+            self._queue.put_nowait((destination, text, on_sent))
+        except queue.Full as error:
+            count_error(error)
+            logging.warning(SINK_OVERFLOW.format(
+                sink=type(self).__name__, destination=destination
+            ))
+
+    def _deliver(self, destination, text, on_sent):
+        """Отправляет одно уведомление, ошибки только записываются."""
+        try:
+            self.send(destination, text)
+        except Exception as error:
+            count_error(error)
+            logging.error(SINK_FAILED.format(
+                sink=type(self).__name__, destination=destination,
+                error=error
+            ))
+            return
+        if on_sent is not None:
+            on_sent()
+
+    def drain(self):
+        """Доставляет накопленные уведомления в текущем потоке."""
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            self._deliver(*item)
+
+    def _run(self):
+        """Цикл фонового потока."""
+        while True:
+            self._deliver(*self._queue.get())
+
+    def start(self):
+        """Запускает фоновый поток доставки."""
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name=type(self).__name__, daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def __len__(self):
+        """Количество уведомлений в очереди."""
+        return self._queue.qsize()
+
+
+class TelegramSink:
+    """Чаты и группы Telegram через Outbox.
+
+    У Outbox свои потоки и лимиты Telegram, поэтому отдельная очередь
+    не нужна. Адрес — chat_id или «tg:<chat_id>».
+    """
+
+    def __init__(self, outbox):
+        """Запоминает очередь отправки."""
+        self.outbox = outbox
+
+    def put(self, destination, text, on_sent=None, on_dropped=None):
+        """Ставит уведомление в очередь чата."""
+        chat_id = str(destination)
+        if chat_id.startswith('tg:'):
+            chat_id = chat_id[len('tg:'):]
+        self.outbox.put(chat_id, text, on_sent, on_dropped)
+
+    def drain(self):
+        """Отправляет накопленные сообщения в текущем потоке."""
+        self.outbox.drain()
+
+    def start(self):
+        """Запускает потоки отправки Outbox."""
+        self.outbox.start()
+        return self
+
+    def __len__(self):
+        """Количество уведомлений в очереди."""
+        return len(self.outbox)
+
+
+class StdoutSink(Sink):
+    """Вывод уведомлений в поток, по умолчанию stdout."""
+
+    def __init__(self, stream=None, maxsize=SINK_QUEUE_SIZE):
+        """Запоминает поток вывода."""
+        super().__init__(maxsize)
+        self.stream = stream
+
+    def send(self, destination, text):
+        """Печатает текст и пустую строку после него."""
+        stream = self.stream or sys.stdout
+        stream.write(text + '\n\n')
+        stream.flush()
+
+
+class SmtpSink(Sink):
+    """Письма через SMTP-сервер; адрес — «mailto:<email>».
+
+    Для проверки подойдёт локальный сервер, например
+    python -m aiosmtpd -n -l localhost:8025.
+    """
+
+    def __init__(self, host=SMTP_HOST, port=SMTP_PORT, sender=SMTP_SENDER,
+                 timeout=SINK_TIMEOUT, maxsize=SINK_QUEUE_SIZE):
+        """Запоминает сервер и отправителя."""
+        super().__init__(maxsize)
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.timeout = timeout
+
+    def send(self, destination, text):
+        """Отправляет письмо с текстом уведомления."""
+        import smtplib
+        from email.message import EmailMessage
+
+        message = EmailMessage()
+        message['Subject'] = NOTIFICATION_SUBJECT
+        message['From'] = self.sender
+        message['To'] = destination.partition(':')[2]
+        message.set_content(text)
+        with smtplib.SMTP(self.host, self.port, timeout=self.timeout) as smtp:
+            smtp.send_message(message)
+
+
+class WebhookSink(Sink):
+    """POST уведомления в JSON {"text": ...} на адрес http(s)."""
+
+    def __init__(self, timeout=SINK_TIMEOUT, maxsize=SINK_QUEUE_SIZE):
+        """Сессия создаётся при первой отправке."""
+        super().__init__(maxsize)
+        self.timeout = timeout
+        self._session = None
+
+    def send(self, destination, text):
+        """Отправляет уведомление; ответ не 2xx — ошибка."""
+        if self._session is None:
+            import requests
+
+            self._session = requests.Session()
+        self._session.post(
+            destination, json={'text': text}, timeout=self.timeout
+        ).raise_for_status()
+
+
+class FanOut:
+    """Рассылка уведомления в чат подписки и по её дополнительным адресам.
+
+    Получатели выбираются по виду адреса (scheme); у каждого своя
+    очередь, поэтому недоступный вебхук не задерживает Telegram.
+    """
+
+    def __init__(self, telegram, sinks=None):
+        """Получатели: telegram — TelegramSink, sinks — вид адреса → Sink."""
+        self.telegram = telegram
+        self.sinks = dict(sinks or {}, tg=telegram)
+
+    def put(self, chat_id, text, on_sent=None, on_dropped=None):
+        """Ставит уведомление в очередь чата подписки."""
+        self.telegram.put(chat_id, text, on_sent, on_dropped)
+
+    def forward(self, destinations, text, plain=None):
+        """Ставит уведомление в очереди дополнительных адресов.
+
+        Чаты Telegram получают text, остальные адреса — plain: текст
+        без экранирования под разметку (по умолчанию тот же text).
+        """
+        for destination in destinations:
+            sink = self.sinks.get(scheme(destination))
+            if sink is None:
+                logging.error(
+                    UNKNOWN_DESTINATION.format(destination=destination)
+                )
+                continue
+            sink.put(
+                destination,
+                text if plain is None or sink is self.telegram else plain
+            )
+
+    def drain(self):
+        """Доставляет накопленное всеми получателями в текущем потоке."""
+        for sink in set(self.sinks.values()):
+            sink.drain()
+
+    def start(self):
+        """Запускает потоки всех получателей."""
+        for sink in set(self.sinks.values()):
+            sink.start()
+        return self
+
+    def __len__(self):
+        """Количество уведомлений во всех очередях."""
+        return sum(len(sink) for sink in set(self.sinks.values()))
+
+
+def create_fan_out(outbox):
+    """Рассылка с Telegram через outbox, SMTP, вебхуками и stdout."""
+    webhook = WebhookSink()
+    return FanOut(TelegramSink(outbox), {
+        'mailto': SmtpSink(),
+        'http': webhook,
+        'https': webhook,
+        'stdout': StdoutSink(),
+    })
@@ -0,0 +1,237 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from records import Status, StatusTable, StatusView
+
+IN_MEMORY = ':memory:'
+STATE_DB = os.getenv('STATE_DB', IN_MEMORY)
+STATE_DB_TIMEOUT = float(os.getenv('STATE_DB_TIMEOUT', 30))
+CLAIM_TTL = int(os.getenv('CLAIM_TTL', 300))
+
+STATE_IN_MEMORY = ('STATE_DB не задан: курсоры и отправленные статусы '
+                   'хранятся в памяти и пропадут при перезапуске')
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS cursors (
+    token TEXT PRIMARY KEY,
+    from_date INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS subscriptions (
+    token TEXT PRIMARY KEY,
+    chat_id TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS statuses (
+    token TEXT NOT NULL,
+    homework TEXT NOT NULL,
+    status TEXT NOT NULL,
+    PRIMARY KEY (token, homework)
+);
+CREATE TABLE IF NOT EXISTS claims (
+    token TEXT PRIMARY KEY,
+    worker_id TEXT NOT NULL,
+    expires REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS homeworks (
+    token TEXT NOT NULL,
+    homework TEXT NOT NULL,
+    name TEXT NOT NULL,
+    status TEXT NOT NULL,
+    lesson_name TEXT,
+    reviewer_comment TEXT,
+    date_updated TEXT,
+    PRIMARY KEY (token, homework)
+);
+'''
+
+
+class StateStore:
+    """Состояние опроса в SQLite: курсоры from_date и отправленные статусы.
+
+    Опросчик вызывает commit() после каждой подписки, поэтому транзакция
+    записи короткая и один файл могут делить несколько процессов: пока
+    другой процесс пишет, запись ждёт до timeout секунд. В режиме WAL
+    с synchronous=NORMAL фиксация не делает fsync, это дёшево. Без
+    STATE_DB база живёт только в памяти процесса.
+    Статусы загруженных токенов держатся в компактной StatusTable, чтобы
+    не читать их из базы на каждом опросе.
+    """
+
+    def __init__(self, path=STATE_DB, timeout=STATE_DB_TIMEOUT):
+        """Открывает базу и создаёт таблицы."""
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            path, timeout=timeout, check_same_thread=False
+        )
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        self._connection.executescript(SCHEMA)
+        self._statuses = StatusTable()
+
+    def load_cursors(self):
+        """Все курсоры одним запросом: токен → current_date."""
+        with self._lock:
+            return dict(self._connection.execute(
+                'SELECT token, from_date FROM cursors'
+            ))
+
+    def load_cursor(self, token):
+        """Курсор токена или None."""
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT from_date FROM cursors WHERE token = ?',
+                (token,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def save_cursor(self, token, current_date):
+        """Запоминает current_date токена до следующего commit()."""
+        if current_date is None:
+            return
+        with self._lock:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO cursors VALUES (?, ?)',
+                (token, current_date)
+            )
+
+    def _records(self, token):
+        """Записи токена из таблицы, при первом обращении — из базы."""
+        records = self._statuses.get(token)
+        if records is None:
+            records = self._statuses.load(token, self._connection.execute(
+                'SELECT homework, status FROM statuses WHERE token = ?',
+                (token,)
+            ))
+        return records
+
+    def load_statuses(self, token):
+        """Отправленные статусы токена только для чтения: работа → статус."""
+        with self._lock:
+            return StatusView(self._records(token))
+
+    def has_reviewing(self, token):
+        """Есть ли у токена работа на ревью."""
+        with self._lock:
+            return Status.REVIEWING in self._records(token).values()
+
+    def save_status(self, token, homework, status, name=None):
+        """Запоминает отправленный статус работы до следующего commit().
+
+        name — название работы для /status, хранится в таблице homeworks.
+        """
+        with self._lock:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO statuses VALUES (?, ?, ?)',
+                (token, homework, status)
+            )
+            if name is not None:
+                self._connection.execute(
+                    'INSERT INTO homeworks (token, homework, name, status) '
+                    'VALUES (?, ?, ?, ?) ON CONFLICT (token, homework) '
+                    'DO UPDATE SET name = excluded.name, '
+                    'status = excluded.status',
+                    (token, homework, name, status)
+                )
+            self._statuses.set(token, homework, status)
+
+    def load_homework_names(self, token):
+        """Названия работ токена: работа → название."""
+        with self._lock:
+            return dict(self._connection.execute(
+                'SELECT homework, name FROM homeworks WHERE token = ?',
+                (token,)
+            ))
+
+    def forget_statuses(self, token):
+        """Выгружает статусы токена из памяти, например при смене шарда."""
+        with self._lock:
+            self._statuses.forget(token)
+
+    def save_homeworks(self, token, rows):
+        """Запоминает историю работ токена до следующего commit().
+
+        rows — кортежи (работа, название, статус, урок, комментарий,
+        дата обновления).
+        """
+        with self._lock:
+            self._connection.executemany(
+                'INSERT OR REPLACE INTO homeworks '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                [(token, *row) for row in rows]
+            )
+
+    def load_subscriptions(self):
+        """Подписки, оформленные командами бота: токен → чат."""
+        with self._lock:
+            return dict(self._connection.execute(
+                'SELECT token, chat_id FROM subscriptions'
+            ))
+
+    def save_subscription(self, token, chat_id):
+        """Запоминает подписку до следующего commit()."""
+        with self._lock:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO subscriptions VALUES (?, ?)',
+                (token, str(chat_id))
+            )
+
+    def delete_subscription(self, token):
+        """Удаляет подписку до следующего commit()."""
+        with self._lock:
+            self._connection.execute(
+                'DELETE FROM subscriptions WHERE token = ?',
+                (token,)
+            )
+
+    def claim(self, token, worker_id, ttl=CLAIM_TTL):
+        """Захватывает токен для опроса воркером на ttl секунд.
+
+        Удаётся, если токен свободен, его захват истёк или уже
+        принадлежит worker_id; захват сразу фиксируется в базе. Статусы
+        токена, доставшегося от другого воркера, выгружаются из памяти:
+        их мог менять прежний владелец.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT worker_id FROM claims WHERE token = ?', (token,)
+            ).fetchone()
+            claimed = self._connection.execute(
+                'INSERT INTO claims VALUES (?, ?, ?) '
+                'ON CONFLICT (token) DO UPDATE SET '
+                'worker_id = excluded.worker_id, expires = excluded.expires '
+                'WHERE claims.worker_id = excluded.worker_id '
+                'OR claims.expires < ?',
+                (token, worker_id, now + ttl, now)
+            ).rowcount == 1
+            self._connection.commit()
+            if claimed and row is not None and row[0] != worker_id:
+                self._statuses.forget(token)
+        return claimed
+
+    def release_claims(self, worker_id):
+        """Снимает все захваты воркера, например при остановке."""
+        with self._lock:
+            self._connection.execute(
+                'DELETE FROM claims WHERE worker_id = ?', (worker_id,)
+            )
+            self._connection.commit()
+
+    def commit(self):
+        """Сбрасывает накопленные изменения на диск."""
+        with self._lock:
+            self._connection.commit()
+
+    def close(self):
+        """Сохраняет изменения и закрывает базу."""
+        self.commit()
+        self._connection.close()
+
+
+def open_state_store(path=STATE_DB):
+    """База состояния процесса; без файла — с предупреждением в лог."""
+    if path == IN_MEMORY:
+        logging.warning(STATE_IN_MEMORY)
+    return StateStore(path)
@@ -0,0 +1,110 @@
+import logging
+import os
+import time
+
+SUBSCRIPTIONS_FILE = os.getenv('SUBSCRIPTIONS_FILE', 'subscriptions.txt')
+
+BAD_SUBSCRIPTION_LINE = 'Некорректная строка подписки: {number}'
+SUBSCRIPTIONS_LOADED = 'Загружено подписок: {count}'
+
+
+class Subscription:
+    """Подписка чата Telegram на статусы работ по токену Практикума."""
+
+    __slots__ = ('token', 'chat_id', 'timestamp', 'changed_at', 'next_poll',
+                 'destinations', 'in_flight', 'removed')
+
+    def __init__(self, token, chat_id, timestamp=None, destinations=()):
+        """Запоминает токен, чат и метку времени последнего опроса.
+
+        changed_at — когда в последний раз менялся статус работы,
+        next_poll — когда подписку пора опросить снова, destinations —
+        дополнительные адреса уведомлений (см. sinks.py), in_flight —
+        статусы, отправка которых ещё не подтверждена, или None,
+        removed — подписка удалена из реестра и больше не опрашивается.
+        """
+        self.token = token
+        self.chat_id = chat_id
+        self.timestamp = timestamp
+        self.destinations = tuple(destinations)
+        self.in_flight = None
+        self.removed = False
+        self.changed_at = time.time()
+        self.next_poll = 0
+
+
+class SubscriptionRegistry:
+    """Реестр подписок: токен → чат → последний current_date."""
+
+    def __init__(self):
+        """Создаёт пустой реестр."""
+        self._subscriptions = {}
+
+    def add(self, token, chat_id, timestamp=None, destinations=()):
+        """Добавляет или заменяет подписку по токену."""
+        self.remove(token)
+        subscription = Subscription(
+            token,
+            chat_id,
+            timestamp or int(time.time()),
+            destinations
+        )
+        self._subscriptions[token] = subscription
+        return subscription
+
+    def remove(self, token):
+        """Удаляет подписку и снимает её с опроса, возвращает её или None."""
+        subscription = self._subscriptions.pop(token, None)
+        if subscription is not None:
+            subscription.removed = True
+            subscription.next_poll = None
+        return subscription
+
+    def get(self, token):
+        """Подписка по токену или None."""
+        return self._subscriptions.get(token)
+
+    def for_chat(self, chat_id):
+        """Подписки чата."""
+        chat_id = str(chat_id)
+        return [
+            subscription for subscription in self
+            if str(subscription.chat_id) == chat_id
+        ]
+
+    def __contains__(self, token):
+        """Есть ли подписка с таким токеном."""
+        return token in self._subscriptions
+
+    def __len__(self):
+        """Количество подписок."""
+        return len(self._subscriptions)
+
+    def __iter__(self):
+        """Обход снимка подписок: реестр можно менять во время обхода."""
+        return iter(list(self._subscriptions.values()))
+
+
+def load_subscriptions(path, registry=None):
+    """Читает подписки из файла: «<токен> <chat_id> [адрес ...]» на строку.
+
+    Адреса — дополнительные получатели уведомлений: «tg:<chat_id>»,
+    «mailto:<email>», URL вебхука или «stdout». Отсутствующий файл —
+    пустой список подписок.
+    """
+    if registry is None:
+        registry = SubscriptionRegistry()
+    if not os.path.exists(path):
+        return registry
+    with open(path, encoding='utf-8') as file:
+        for number, line in enumerate(file, start=1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            parts = line.split()
+            if len(parts) < 2:
+                logging.error(BAD_SUBSCRIPTION_LINE.format(number=number))
+                continue
+            registry.add(parts[0], parts[1], destinations=parts[2:])
+    logging.info(SUBSCRIPTIONS_LOADED.format(count=len(registry)))
+    return registry
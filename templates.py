@@ -0,0 +1,99 @@
+import html
+import os
+from collections import namedtuple
+
+NOTIFICATION_LOCALE = os.getenv('NOTIFICATION_LOCALE', 'ru')
+NOTIFICATION_MARKUP = os.getenv('NOTIFICATION_MARKUP') or None
+REVIEWER_COMMENTS = os.getenv('REVIEWER_COMMENTS', '') not in ('', '0')
+
+MARKDOWN_V2 = 'MarkdownV2'
+HTML = 'HTML'
+MARKDOWN_V2_SPECIAL = '\\_*[]()~`>#+-=|{}.!'
+MARKDOWN_V2_TABLE = str.maketrans(
+    {char: '\\' + char for char in MARKDOWN_V2_SPECIAL}
+)
+
+UNKNOWN_MARKUP = 'Неизвестная разметка: {markup}'
+NO_FIELD = 'В шаблоне нет поля {{{field}}}: {template}'
+
+Locale = namedtuple('Locale', ('header', 'verdicts', 'comment'))
+Compiled = namedtuple('Compiled', ('prefix', 'middle', 'verdict', 'comment'))
+
+TRANSLATIONS = {
+    'en': Locale(
+        'Homework "{homework_name}" review status changed.{verdict}',
+        {
+            'approved': ' The reviewer liked everything. Hooray!',
+            'reviewing': ' The reviewer has started reviewing.',
+            'rejected': ' The reviewer has comments.',
+        },
+        ' Reviewer comment: {comment}.'
+    ),
+}
+
+
+def escape(text, markup=None):
+    """Экранирует текст для разметки Telegram; без разметки — как есть."""
+    if markup is None:
+        return text
+    if markup == MARKDOWN_V2:
+        return text.translate(MARKDOWN_V2_TABLE)
+    if markup == HTML:
+        return html.escape(text, quote=False)
+    raise ValueError(UNKNOWN_MARKUP.format(markup=markup))
+
+
+def split_template(template, *fields):
+    """Текст шаблона между полями fields, идущими в этом порядке."""
+    markers = [f'\0{number}\0' for number in range(len(fields))]
+    rest = template.format(**dict(zip(fields, markers)))
+    parts = []
+    for field, marker in zip(fields, markers):
+        part, found, rest = rest.partition(marker)
+        if not found:
+            raise ValueError(NO_FIELD.format(field=field, template=template))
+        parts.append(part)
+    return parts + [rest]
+
+
+class Templates:
+    """Уведомления о смене статуса из заранее собранных фрагментов.
+
+    Для каждой тройки (статус, язык, разметка) неизменные части
+    сообщения собираются и экранируются один раз; при отправке
+    экранируются только название работы и комментарий ревьюера.
+    """
+
+    def __init__(self, locales, markups=(None, MARKDOWN_V2, HTML)):
+        """Собирает фрагменты всех статусов, языков и разметок."""
+        self._compiled = {}
+        for locale, (header, verdicts, comment) in locales.items():
+            prefix, middle, trailer = split_template(
+                header, 'homework_name', 'verdict'
+            )
+            comment = split_template(comment, 'comment')
+            for markup in markups:
+                for status, verdict in verdicts.items():
+                    self._compiled[status, locale, markup] = Compiled(
+                        escape(prefix, markup),
+                        escape(middle, markup),
+                        escape(verdict + trailer, markup),
+                        tuple(escape(part, markup) for part in comment)
+                    )
+
+    def render(self, homework_name, status, locale=NOTIFICATION_LOCALE,
+               markup=None, comment=None):
+        """Текст уведомления; comment вставляется перед вердиктом.
+
+        Для неизвестной тройки (статус, язык, разметка) — KeyError.
+        """
+        compiled = self._compiled[status, locale, markup]
+        name = escape(homework_name, markup)
+        if not comment:
+            return compiled.prefix + name + compiled.middle + compiled.verdict
+        before, after = compiled.comment
+        return (
+            compiled.prefix + name + compiled.middle
+            + before + escape(comment, markup) + after
+            + compiled.verdict
+        )
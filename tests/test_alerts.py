@@ -0,0 +1,28 @@
+def test_same_error_is_suppressed_within_window(monkeypatch):
+    import alerts
+
+    now = [1000.0]
+    monkeypatch.setattr(alerts.time, 'time', lambda: now[0])
+    notifier = alerts.ErrorNotifier(window=3600)
+
+    assert notifier.should_notify('chat', ConnectionError('port 443'))
+    now[0] += 600
+    assert not notifier.should_notify('chat', ConnectionError('port 8443')), (
+        'Убедитесь, что ошибки, отличающиеся только числами, '
+        'считаются одним сбоем.'
+    )
+    assert notifier.should_notify('chat', KeyError('homeworks')), (
+        'Убедитесь, что о новом сбое сообщается сразу.'
+    )
+    now[0] += 3600
+    assert notifier.should_notify('chat', KeyError('homeworks'))
+
+
+def test_recovery_is_reported_once():
+    import alerts
+
+    notifier = alerts.ErrorNotifier()
+    assert not notifier.recovered('chat')
+    notifier.should_notify('chat', ValueError('broken'))
+    assert notifier.recovered('chat')
+    assert not notifier.recovered('chat')
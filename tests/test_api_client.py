@@ -0,0 +1,61 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        body = b'{"homeworks": [], "current_date": 1}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def local_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), KeepAliveHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_port}/'
+    server.shutdown()
+    server.server_close()
+
+
+def test_session_reuses_connections(local_server):
+    import api_client
+
+    session = api_client.create_session()
+    for _ in range(3):
+        session.get(local_server, timeout=5).json()
+    stats = api_client.connection_stats(session)
+    assert stats.requests == 3
+    assert stats.connections == 1, (
+        'Убедитесь, что сессия переиспользует keep-alive соединение.'
+    )
+    assert stats.reuse_rate == pytest.approx(2 / 3)
+
+
+def test_connection_error_hides_token():
+    import requests
+
+    import homework
+
+    def refuse(url, **kwargs):
+        raise requests.exceptions.ConnectionError('refused')
+
+    with pytest.raises(ConnectionError) as error:
+        homework.send_api_request(
+            refuse, homework.make_headers('secret-token'), 0
+        )
+
+    assert 'secret-token' not in str(error.value), (
+        'Убедитесь, что токен не попадает в текст ошибки и в лог.'
+    )
@@ -0,0 +1,76 @@
+import json
+
+import pytest
+import requests
+import utils
+
+
+def test_backfill_stores_history_and_cursor(monkeypatch, tmp_path):
+    import api_client
+    import backfill
+    import resilience
+    import storage
+
+    def mock_session_get(session, url, **kwargs):
+        token = kwargs['headers']['Authorization'].partition('OAuth ')[2]
+        assert kwargs['params'] == {'from_date': 0}
+        data = {
+            'homeworks': [
+                {'id': 1, 'homework_name': 'hw1', 'status': 'approved',
+                 'lesson_name': 'Урок'},
+                {'id': 2, 'homework_name': 'hw2', 'status': 'unknown'},
+            ] if token != 'broken' else {},
+            'current_date': 100,
+        }
+        response = utils.MockResponseGET(url, **kwargs)
+        response.headers = {}
+        response.content = json.dumps(data).encode()
+        return response
+
+    monkeypatch.setattr(requests.Session, 'get', mock_session_get)
+    monkeypatch.setattr(
+        api_client, 'circuit_breaker', resilience.CircuitBreaker()
+    )
+    tokens = tmp_path / 'tokens.txt'
+    tokens.write_text('# токены\ntoken-1 111\ntoken-2\n\nbroken\n')
+    store = storage.StateStore(':memory:')
+
+    result = backfill.backfill(
+        backfill.read_tokens(tokens), store, concurrency=2
+    )
+
+    assert (result['tokens'], result['homeworks'], result['errors']) == (
+        2, 2, 1
+    )
+    assert store.load_cursors() == {'token-1': 100, 'token-2': 100}
+    assert store.load_statuses('token-2') == {'1': 'approved'}
+
+
+def test_backfill_keeps_newer_cursor(monkeypatch):
+    import backfill
+    import storage
+
+    monkeypatch.setattr(backfill, 'iter_histories', lambda tokens, _: [
+        (token, {'homeworks': [], 'current_date': 100}) for token in tokens
+    ])
+    store = storage.StateStore(':memory:')
+    store.save_cursor('token-1', 500)
+
+    backfill.backfill(['token-1', 'token-2'], store)
+
+    assert store.load_cursors() == {'token-1': 500, 'token-2': 100}, (
+        'Убедитесь, что загрузка истории не переносит курсор назад.'
+    )
+
+
+def test_backfill_refuses_in_memory_db(monkeypatch, tmp_path):
+    import backfill
+
+    tokens = tmp_path / 'tokens.txt'
+    tokens.write_text('token-1\n')
+    monkeypatch.setattr(
+        'sys.argv', ['backfill.py', str(tokens), '--db', ':memory:']
+    )
+    with pytest.raises(SystemExit) as error:
+        backfill.main()
+    assert error.value.code == 2
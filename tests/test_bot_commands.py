@@ -0,0 +1,145 @@
+from types import SimpleNamespace
+
+import pytest
+
+
+class FakeMessage:
+    def __init__(self):
+        self.replies = []
+
+    def reply_text(self, text):
+        self.replies.append(text)
+
+
+@pytest.fixture
+def bot_data():
+    import scheduling
+    import storage
+    import subscriptions
+
+    polled = []
+    return dict(
+        registry=subscriptions.SubscriptionRegistry(),
+        queue=scheduling.PollQueue(),
+        store=storage.StateStore(':memory:'),
+        poll=polled.append,
+        polled=polled,
+    )
+
+
+def run_command(callback, bot_data, chat_id, *args):
+    message = FakeMessage()
+    update = SimpleNamespace(
+        message=message, effective_chat=SimpleNamespace(id=chat_id)
+    )
+    callback(update, SimpleNamespace(args=list(args), bot_data=bot_data))
+    return message.replies
+
+
+def test_subscribe_registers_and_polls(bot_data):
+    import bot_commands
+
+    replies = run_command(bot_commands.subscribe, bot_data, 111, 'token-1')
+
+    assert replies == [bot_commands.SUBSCRIBED]
+    subscription = bot_data['registry'].get('token-1')
+    assert subscription.chat_id == '111'
+    assert bot_data['polled'] == [subscription], (
+        'Убедитесь, что новая подписка сразу опрашивается.'
+    )
+    assert len(bot_data['queue']) == 1
+    assert bot_data['store'].load_subscriptions() == {'token-1': '111'}
+
+
+def test_subscribe_without_token_shows_usage(bot_data):
+    import bot_commands
+
+    replies = run_command(bot_commands.subscribe, bot_data, 111)
+    assert replies == [bot_commands.SUBSCRIBE_USAGE]
+    assert not bot_data['registry']
+
+
+def test_status_and_unsubscribe(bot_data):
+    import bot_commands
+
+    run_command(bot_commands.subscribe, bot_data, 111, 'token-1')
+    bot_data['store'].save_status('token-1', 'hw123', 'approved')
+
+    replies = run_command(bot_commands.status, bot_data, 111)
+    assert replies == [
+        'hw123: Работа проверена: ревьюеру всё понравилось. Ура!'
+    ]
+
+    replies = run_command(bot_commands.unsubscribe, bot_data, 111)
+    assert replies == [bot_commands.UNSUBSCRIBED]
+    assert 'token-1' not in bot_data['registry']
+    assert bot_data['store'].load_subscriptions() == {}
+    assert run_command(bot_commands.status, bot_data, 111) == [
+        bot_commands.NOT_SUBSCRIBED
+    ]
+
+
+def test_status_shows_homework_name(bot_data):
+    import bot_commands
+    import homework
+
+    run_command(bot_commands.subscribe, bot_data, 111, 'token-1')
+    homework.remember_statuses(bot_data['store'], 'token-1', [
+        {'id': 7, 'homework_name': 'user__hw_python_oop.zip',
+         'status': 'rejected'}
+    ])
+
+    assert run_command(bot_commands.status, bot_data, 111) == [
+        'user__hw_python_oop.zip: Работа проверена: у ревьюера есть '
+        'замечания.'
+    ], 'Убедитесь, что /status показывает название работы, а не её id.'
+
+
+def test_resubscribe_keeps_subscription(bot_data):
+    import bot_commands
+
+    run_command(bot_commands.subscribe, bot_data, 111, 'token-1')
+    subscription = bot_data['registry'].get('token-1')
+    subscription.timestamp = 100
+    replies = run_command(bot_commands.subscribe, bot_data, 111, 'token-1')
+
+    assert replies == [bot_commands.ALREADY_SUBSCRIBED]
+    assert bot_data['registry'].get('token-1') is subscription, (
+        'Убедитесь, что повторная подписка не сбрасывает курсор.'
+    )
+    assert subscription.timestamp == 100
+
+
+def test_token_of_another_chat_is_not_taken(bot_data):
+    import bot_commands
+
+    run_command(bot_commands.subscribe, bot_data, 111, 'token-1')
+    replies = run_command(bot_commands.subscribe, bot_data, 222, 'token-1')
+
+    assert replies == [bot_commands.TOKEN_TAKEN]
+    assert bot_data['registry'].get('token-1').chat_id == '111', (
+        'Убедитесь, что чужой токен не переносит подписку в другой чат.'
+    )
+    assert bot_data['store'].load_subscriptions() == {'token-1': '111'}
+
+
+def test_unsubscribed_during_poll_is_not_requeued(monkeypatch, bot_data):
+    import bot_commands
+    import poller
+
+    run_command(bot_commands.subscribe, bot_data, 111, 'token-1')
+    queue = bot_data['queue']
+    subscription = queue.pop_due(float('inf'))[0]
+
+    def fetch_and_unsubscribe(subscription):
+        run_command(bot_commands.unsubscribe, bot_data, 111)
+        return {'homeworks': [], 'current_date': 1}
+
+    monkeypatch.setattr(poller, 'fetch_api_answer', fetch_and_unsubscribe)
+    poller.poll_subscription(None, subscription, bot_data['store'])
+    queue.push(subscription)
+
+    assert 'token-1' not in bot_data['registry']
+    assert queue.next_due() is None, (
+        'Убедитесь, что отписанный токен не возвращается в очередь опроса.'
+    )
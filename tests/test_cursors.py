@@ -0,0 +1,82 @@
+import pytest
+
+
+@pytest.fixture
+def cursors():
+    import cursors
+    return cursors
+
+
+def test_cursor_only_moves_forward(cursors):
+    assert cursors.advance_cursor(None, 100) == 100
+    assert cursors.advance_cursor(100, 200) == 200
+    assert cursors.advance_cursor(200, 100) == 200
+    assert cursors.advance_cursor(200, None) == 200
+    assert cursors.advance_cursor(200, '300') == 200
+
+
+def test_from_date_overlaps_cursor(cursors):
+    assert cursors.poll_from_date(1000, 1100, overlap=60) == 940
+    assert cursors.poll_from_date(None, 1100.5) == 1100
+
+
+def test_catch_up_is_not_truncated(cursors):
+    assert cursors.poll_from_date(
+        0, 10_000, overlap=60, max_catch_up=3600
+    ) == -60
+    assert cursors.advance_cursor(0, 10_000) == 10_000
+
+
+def test_event_in_gap_is_delivered(cursors, monkeypatch):
+    import time
+
+    import outbox
+    import poller
+    import storage
+    import subscriptions
+
+    class RecordingBot:
+        sent = []
+
+        def send_message(self, chat_id, text):
+            self.sent.append(text)
+
+    now = int(time.time())
+    day = 24 * 3600
+    event = {'id': 1, 'homework_name': 'hw', 'status': 'approved',
+             'updated': now - 10 * day}
+    from_dates = []
+
+    def fetch(token, from_date):
+        from_dates.append(from_date)
+        return {
+            'homeworks': [event] if event['updated'] >= from_date else [],
+            'current_date': now,
+        }
+
+    monkeypatch.setattr(poller, 'fetch_homework_statuses', fetch)
+    registry = subscriptions.SubscriptionRegistry()
+    registry.add('token-1', '111', now - 20 * day)
+    mailbox = outbox.Outbox(RecordingBot(), global_rate=1000, chat_rate=1000)
+    store = storage.StateStore(':memory:')
+    for _ in range(2):
+        poller.poll_all(mailbox, registry, store)
+        mailbox.drain()
+
+    assert len(RecordingBot.sent) == 1 and '"hw"' in RecordingBot.sent[0], (
+        'Убедитесь, что изменение из пропуска после простоя доставляется.'
+    )
+    assert registry.get('token-1').timestamp == now
+    assert from_dates[1] == now - cursors.CURSOR_OVERLAP, (
+        'Убедитесь, что после ответа курсор сразу переходит на current_date.'
+    )
+
+
+def test_zero_from_date_is_sent_as_is():
+    import homework
+
+    calls = []
+    homework.send_api_request(
+        lambda url, **kwargs: calls.append(kwargs), {}, 0
+    )
+    assert calls[0]['params'] == {'from_date': 0}
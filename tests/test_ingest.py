@@ -0,0 +1,112 @@
+from functools import partial
+
+import pytest
+import requests
+
+
+class RecordingBot:
+    def __init__(self):
+        self.sent = []
+
+    def send_message(self, chat_id, text):
+        self.sent.append((chat_id, text))
+
+
+@pytest.fixture
+def ingest_url():
+    import ingest
+    import outbox
+    import poller
+    import storage
+    import subscriptions
+
+    registry = subscriptions.SubscriptionRegistry()
+    registry.add('token-1', '111', 1)
+    mailbox = outbox.Outbox(RecordingBot(), global_rate=1000, chat_rate=1000)
+    server = ingest.start_ingest_server(
+        partial(
+            poller.handle_pushed_event,
+            mailbox,
+            registry,
+            storage.StateStore(':memory:')
+        ),
+        port=0,
+        host='127.0.0.1'
+    )
+    yield f'http://127.0.0.1:{server.server_port}/homework_statuses/', mailbox
+    server.shutdown()
+    server.server_close()
+
+
+def post(url, token, payload):
+    return requests.post(
+        url,
+        json=payload,
+        headers={'Authorization': f'OAuth {token}'},
+        timeout=5
+    )
+
+
+def test_pushed_status_is_delivered(ingest_url):
+    url, mailbox = ingest_url
+    payload = {
+        'homeworks': [{'homework_name': 'hw123', 'status': 'approved'}],
+        'current_date': 100
+    }
+    assert post(url, 'token-1', payload).status_code == 202
+    mailbox.drain()
+    assert len(mailbox.bot.sent) == 1
+    assert mailbox.bot.sent[0][0] == '111'
+    assert 'Ура!' in mailbox.bot.sent[0][1]
+
+
+def test_unknown_token_and_bad_payload_are_rejected(ingest_url):
+    url, mailbox = ingest_url
+    assert post(url, 'unknown', {'homeworks': []}).status_code == 404
+    assert post(url, 'token-1', {'homeworks': []}).status_code == 400, (
+        'Убедитесь, что событие проверяется функцией check_response.'
+    )
+    assert post(url, 'token-1', ['not', 'dict']).status_code == 400
+    mailbox.drain()
+    assert mailbox.bot.sent == []
+
+
+def test_push_does_not_move_poll_cursor(monkeypatch):
+    import time
+
+    import cursors
+    import outbox
+    import poller
+    import storage
+    import subscriptions
+
+    cursor = int(time.time()) - 3600
+    registry = subscriptions.SubscriptionRegistry()
+    registry.add('token-1', '111', cursor)
+    store = storage.StateStore(':memory:')
+    mailbox = outbox.Outbox(RecordingBot(), global_rate=1000, chat_rate=1000)
+    payload = {
+        'homeworks': [{'id': 1, 'homework_name': 'hw', 'status': 'approved'}],
+        'current_date': 10 ** 10
+    }
+
+    assert poller.handle_pushed_event(
+        mailbox, registry, store, 'token-1', payload
+    )
+    mailbox.drain()
+    from_dates = []
+    monkeypatch.setattr(
+        poller,
+        'fetch_homework_statuses',
+        lambda token, from_date: from_dates.append(from_date) or {
+            'homeworks': [], 'current_date': cursor
+        }
+    )
+    poller.poll_all(mailbox, registry, store)
+
+    assert len(mailbox.bot.sent) == 1
+    assert registry.get('token-1').timestamp == cursor
+    assert store.load_cursor('token-1') in (None, cursor)
+    assert from_dates == [cursor - cursors.CURSOR_OVERLAP], (
+        'Убедитесь, что присланное событие не сдвигает курсор опроса.'
+    )
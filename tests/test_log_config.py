@@ -0,0 +1,38 @@
+import atexit
+import json
+import logging
+
+import pytest
+
+
+@pytest.fixture
+def log_config():
+    import log_config
+    return log_config
+
+
+def test_json_records_go_through_queue(log_config, tmp_path):
+    path = tmp_path / 'program.log'
+    logger = logging.getLogger('test_log_config')
+    logger.propagate = False
+    listener = log_config.setup_logging(logger, str(path), json_format=True)
+    try:
+        logger.error('Сбой', extra=log_config.tenant('token-1'))
+    finally:
+        atexit.unregister(listener.stop)
+        listener.stop()
+        logger.handlers.clear()
+
+    record = json.loads(path.read_text(encoding='utf-8'))
+    assert record['message'] == 'Сбой' and record['level'] == 'ERROR'
+    assert record['tenant'] == log_config.tenant_id('token-1')
+    assert 'token-1' not in path.read_text(encoding='utf-8')
+
+
+def test_sampling_keeps_warnings(log_config):
+    sampling = log_config.SamplingFilter(rate=0)
+    debug = logging.makeLogRecord({'levelno': logging.DEBUG})
+    warning = logging.makeLogRecord({'levelno': logging.WARNING})
+
+    assert not sampling.filter(debug)
+    assert sampling.filter(warning)
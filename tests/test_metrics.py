@@ -0,0 +1,57 @@
+import pytest
+import requests
+import telegram
+
+
+@pytest.fixture
+def metrics():
+    import metrics
+    return metrics
+
+
+def test_histogram_exposes_cumulative_buckets(metrics):
+    histogram = metrics.Histogram('latency_seconds', 'Задержка', (0.1, 1))
+    for value in (0.05, 0.5, 0.5, 5):
+        histogram.observe(value)
+
+    text = metrics.render([histogram])
+
+    assert '# TYPE latency_seconds histogram' in text
+    assert 'latency_seconds_bucket{le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{le="1"} 3' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 4' in text
+    assert 'latency_seconds_count 4' in text
+
+
+def test_outbox_counts_telegram_errors(metrics):
+    import outbox
+
+    class BrokenBot:
+        def send_message(self, chat_id, text):
+            raise telegram.error.BadRequest('chat not found')
+
+    before = metrics.ERRORS.value('BadRequest')
+    sent = metrics.SEND_LATENCY.count
+    mailbox = outbox.Outbox(BrokenBot(), global_rate=1000, chat_rate=1000)
+    mailbox.put('1', 'notice')
+    mailbox.drain()
+
+    assert metrics.ERRORS.value('BadRequest') == before + 1
+    assert metrics.SEND_LATENCY.count == sent + 1
+
+
+def test_metrics_endpoint_serves_text(metrics):
+    server = metrics.start_metrics_server(port=0, host='127.0.0.1')
+    try:
+        metrics.POLL_QUEUE_DEPTH.set_function(lambda: 3)
+        response = requests.get(
+            f'http://127.0.0.1:{server.server_port}/metrics', timeout=5
+        )
+    finally:
+        metrics.POLL_QUEUE_DEPTH.set_function(None)
+        server.shutdown()
+        server.server_close()
+
+    assert response.status_code == 200
+    assert 'poll_queue_depth 3' in response.text
+    assert '# TYPE homework_api_request_seconds histogram' in response.text
@@ -0,0 +1,164 @@
+import time
+
+import pytest
+import telegram
+
+
+class FlakyBot:
+    def __init__(self, errors=()):
+        self.errors = list(errors)
+        self.sent = []
+
+    def send_message(self, chat_id, text):
+        if self.errors:
+            raise self.errors.pop(0)
+        self.sent.append((chat_id, text))
+
+
+@pytest.fixture
+def outbox_module():
+    import outbox
+    return outbox
+
+
+def test_notices_for_one_chat_are_batched(outbox_module):
+    bot = FlakyBot()
+    outbox = outbox_module.Outbox(bot, global_rate=1000, chat_rate=1000)
+    for number in range(3):
+        outbox.put('1', f'notice {number}')
+    outbox.put('2', 'other chat')
+    outbox.drain()
+
+    assert bot.sent == [
+        ('1', 'notice 0\n\nnotice 1\n\nnotice 2'),
+        ('2', 'other chat'),
+    ], 'Убедитесь, что уведомления одного чата уходят одним сообщением.'
+
+
+def test_chat_rate_is_limited(outbox_module):
+    bot = FlakyBot()
+    outbox = outbox_module.Outbox(bot, global_rate=1000, chat_rate=20)
+    started = time.monotonic()
+    outbox.put('1', 'first')
+    outbox.drain()
+    outbox.put('1', 'second')
+    outbox.drain()
+
+    assert len(bot.sent) == 2
+    assert time.monotonic() - started >= 0.05, (
+        'Убедитесь, что в один чат пишем не чаще CHAT_SEND_RATE.'
+    )
+
+
+def test_global_rate_is_limited(outbox_module):
+    bot = FlakyBot()
+    outbox = outbox_module.Outbox(bot, global_rate=200, chat_rate=1000)
+    started = time.monotonic()
+    for chat_id in range(300):
+        outbox.put(chat_id, 'notice')
+    outbox.drain()
+
+    assert len(bot.sent) == 300
+    assert time.monotonic() - started >= 0.45, (
+        'Убедитесь, что общий поток сообщений ограничен GLOBAL_SEND_RATE.'
+    )
+
+
+def test_retry_after_is_honored(outbox_module):
+    bot = FlakyBot([telegram.error.RetryAfter(0.05)])
+    outbox = outbox_module.Outbox(bot, global_rate=1000, chat_rate=1000)
+    delivered = []
+    started = time.monotonic()
+    outbox.put('1', 'notice', lambda: delivered.append(True))
+    outbox.drain()
+
+    assert bot.sent == [('1', 'notice')], (
+        'Убедитесь, что после RetryAfter сообщение отправляется повторно.'
+    )
+    assert delivered == [True]
+    assert time.monotonic() - started >= 0.05
+
+
+def test_permanent_error_drops_message(outbox_module):
+    bot = FlakyBot([telegram.error.BadRequest('chat not found')])
+    outbox = outbox_module.Outbox(bot, global_rate=1000, chat_rate=1000)
+    delivered = []
+    outbox.put('1', 'notice', lambda: delivered.append(True))
+    outbox.drain()
+
+    assert bot.sent == [] and delivered == []
+
+
+def test_background_thread_drains_queue(outbox_module):
+    bot = FlakyBot([telegram.error.NetworkError('reset')])
+    outbox = outbox_module.Outbox(
+        bot, global_rate=1000, chat_rate=1000
+    ).start()
+    outbox.put('1', 'notice')
+
+    assert outbox.join(timeout=5)
+    assert bot.sent == [('1', 'notice')]
+
+
+def test_failing_callback_keeps_sender_alive(outbox_module):
+    bot = FlakyBot()
+    outbox = outbox_module.Outbox(
+        bot, global_rate=1000, chat_rate=1000
+    ).start(workers=1)
+
+    def fail():
+        raise RuntimeError('database is locked')
+
+    outbox.put('1', 'first', fail)
+    assert outbox.join(timeout=5)
+    outbox.put('2', 'second')
+
+    assert outbox.join(timeout=5), (
+        'Убедитесь, что ошибка обработчика не останавливает поток отправки.'
+    )
+    assert bot.sent == [('1', 'first'), ('2', 'second')]
+
+
+def test_long_message_is_split(outbox_module):
+    bot = FlakyBot()
+    outbox = outbox_module.Outbox(bot, global_rate=1000, chat_rate=1000)
+    delivered = []
+    text = '\n\n'.join(['word ' * 500] * 3 + ['comment ' * 1000])
+    outbox.put('1', text, lambda: delivered.append(True))
+    outbox.drain()
+
+    assert all(len(sent) <= 4096 for _, sent in bot.sent), (
+        'Убедитесь, что сообщения длиннее 4096 символов делятся на части.'
+    )
+    assert len(bot.sent) > 1 and delivered == [True]
+    assert ' '.join(sent for _, sent in bot.sent).split() == text.split()
+
+
+def test_dropped_part_releases_once(outbox_module):
+    bot = FlakyBot([telegram.error.BadRequest('too long')] * 2)
+    outbox = outbox_module.Outbox(bot, global_rate=1000, chat_rate=1000)
+    delivered = []
+    dropped = []
+    outbox.put(
+        '1', 'word ' * 2000,
+        lambda: delivered.append(True), lambda: dropped.append(True)
+    )
+    outbox.drain()
+
+    assert delivered == [] and dropped == [True]
+
+
+def test_parse_mode_is_passed_to_bot(outbox_module):
+    class MarkupBot:
+        sent = []
+
+        def send_message(self, chat_id, text, **options):
+            self.sent.append((chat_id, text, options))
+
+    bot = MarkupBot()
+    outbox = outbox_module.Outbox(bot, global_rate=1000, chat_rate=1000,
+                                  parse_mode='MarkdownV2')
+    outbox.put('1', 'text')
+    outbox.drain()
+
+    assert bot.sent == [('1', 'text', {'parse_mode': 'MarkdownV2'})]
@@ -0,0 +1,497 @@
+import json
+from http import HTTPStatus
+
+import pytest
+import requests
+import utils
+
+
+def create_mock_session_get(data, calls=None, before=None):
+    def mock_session_get(session, url, **kwargs):
+        if calls is not None:
+            calls.append(kwargs)
+        if before is not None:
+            before()
+        response = utils.MockResponseGET(url, **kwargs)
+        response.headers = {}
+        response.content = json.dumps(data).encode()
+        response.json = lambda: data
+        return response
+    return mock_session_get
+
+
+class RecordingBot:
+    def __init__(self):
+        self.sent = []
+
+    def send_message(self, chat_id, text):
+        self.sent.append((chat_id, text))
+
+
+@pytest.fixture
+def outbox():
+    import outbox
+
+    return outbox.Outbox(RecordingBot(), global_rate=1000, chat_rate=1000)
+
+
+@pytest.fixture(autouse=True)
+def fresh_api_client(monkeypatch):
+    import alerts
+    import api_client
+    import poller
+    import resilience
+    import response_cache
+
+    monkeypatch.setattr(
+        api_client, 'response_cache', response_cache.ResponseCache()
+    )
+    monkeypatch.setattr(
+        api_client, 'circuit_breaker', resilience.CircuitBreaker()
+    )
+    monkeypatch.setattr(poller, 'error_notifier', alerts.ErrorNotifier())
+
+
+def test_load_subscriptions(tmp_path):
+    import subscriptions
+
+    path = tmp_path / 'subscriptions.txt'
+    path.write_text(
+        '# токен чат\n'
+        'token-1 111\n'
+        '\n'
+        'broken-line\n'
+        'token-2 222\n',
+        encoding='utf-8'
+    )
+    registry = subscriptions.load_subscriptions(str(path))
+    assert len(registry) == 2, (
+        'Убедитесь, что некорректные строки и комментарии пропускаются.'
+    )
+    assert registry.get('token-2').chat_id == '222'
+    assert registry.get('token-1').timestamp, (
+        'Убедитесь, что подписке назначается начальная метка времени.'
+    )
+
+
+def test_subscription_destinations(tmp_path):
+    import subscriptions
+
+    path = tmp_path / 'subscriptions.txt'
+    path.write_text('token-1 111 mailto:a@example.com stdout\ntoken-2 222\n')
+    registry = subscriptions.load_subscriptions(str(path))
+
+    assert registry.get('token-1').destinations == (
+        'mailto:a@example.com', 'stdout'
+    )
+    assert registry.get('token-2').destinations == ()
+
+
+def test_poll_all_uses_tenant_token_and_chat(monkeypatch, random_timestamp,
+                                             outbox):
+    import poller
+    import storage
+    import subscriptions
+
+    calls = []
+    data = {
+        'homeworks': [{'homework_name': 'hw123', 'status': 'approved'}],
+        'current_date': random_timestamp
+    }
+    monkeypatch.setattr(
+        requests.Session, 'get', create_mock_session_get(data, calls)
+    )
+    registry = subscriptions.SubscriptionRegistry()
+    registry.add('token-1', '111', random_timestamp - 1000)
+    registry.add('token-2', '222', random_timestamp - 1000)
+
+    poller.poll_all(outbox, registry, storage.StateStore(':memory:'))
+    outbox.drain()
+
+    assert [call['headers']['Authorization'] for call in calls] == [
+        'OAuth token-1', 'OAuth token-2'
+    ], 'Убедитесь, что каждая подписка опрашивается со своим токеном.'
+    assert [chat_id for chat_id, _ in outbox.bot.sent] == ['111', '222']
+    assert all(
+        subscription.timestamp == random_timestamp
+        for subscription in registry
+    ), 'Убедитесь, что current_date сохраняется в подписке.'
+
+
+def test_unchanged_response_is_not_parsed(monkeypatch, random_timestamp,
+                                          outbox):
+    import poller
+    import storage
+    import subscriptions
+
+    data = {'homeworks': [], 'current_date': random_timestamp}
+    monkeypatch.setattr(
+        requests.Session, 'get', create_mock_session_get(data)
+    )
+    registry = subscriptions.SubscriptionRegistry()
+    registry.add('token-1', '111', random_timestamp)
+    checked = []
+    monkeypatch.setattr(
+        poller,
+        'check_response',
+        lambda response: checked.append(response) or []
+    )
+
+    store = storage.StateStore(':memory:')
+    poller.poll_all(outbox, registry, store)
+    poller.poll_all(outbox, registry, store)
+
+    assert len(checked) == 1, (
+        'Убедитесь, что неизменившийся ответ не проверяется повторно.'
+    )
+
+
+def test_cache_hits_when_current_date_moves(monkeypatch, random_timestamp,
+                                            outbox):
+    import api_client
+    import poller
+    import storage
+    import subscriptions
+
+    data = {'homeworks': [], 'current_date': random_timestamp}
+
+    def move_current_date():
+        data['current_date'] += 600
+
+    monkeypatch.setattr(
+        requests.Session,
+        'get',
+        create_mock_session_get(data, before=move_current_date)
+    )
+    parsed = []
+    parse_api_response = api_client.parse_api_response
+    monkeypatch.setattr(
+        api_client,
+        'parse_api_response',
+        lambda *args: parsed.append(args) or parse_api_response(*args)
+    )
+    registry = subscriptions.SubscriptionRegistry()
+    registry.add('token-1', '111', random_timestamp)
+
+    store = storage.StateStore(':memory:')
+    for _ in range(5):
+        poller.poll_all(outbox, registry, store)
+
+    assert len(parsed) == 1, (
+        'Убедитесь, что ответ с новым current_date, но теми же работами, '
+        'не разбирается повторно.'
+    )
+    assert api_client.response_cache.hits == 4
+    assert registry.get('token-1').timestamp == data['current_date'], (
+        'Убедитесь, что курсор сдвигается и при попадании в кеш.'
+    )
+
+
+def test_invalid_response_is_not_cached(monkeypatch, random_timestamp,
+                                        outbox):
+    import poller
+    import storage
+    import subscriptions
+
+    data = {
+        'homeworks': [{'id': 1, 'homework_name': 'hw', 'status': 'weird'}],
+        'current_date': random_timestamp
+    }
+    monkeypatch.setattr(
+        requests.Session, 'get', create_mock_session_get(data)
+    )
+    registry = subscriptions.SubscriptionRegistry()
+    registry.add('token-1', '111', random_timestamp - 1000)
+
+    store = storage.StateStore(':memory:')
+    for _ in range(2):
+        poller.poll_all(outbox, registry, store)
+        outbox.drain()
+
+    assert len(outbox.bot.sent) == 1, (
+        'Убедитесь, что о сбое сообщается один раз, а повтор того же '
+        'ответа не считается восстановлением.'
+    )
+    assert registry.get('token-1').timestamp == random_timestamp - 1000, (
+        'Убедитесь, что курсор не сдвигается по непрошедшему проверку ответу.'
+    )
+
+
+def test_poll_all_async_overlaps_requests(monkeypatch, random_timestamp,
+                                          outbox):
+    import asyncio
+    import threading
+
+    import poller
+    import storage
+    import subscriptions
+
+    barrier = threading.Barrier(3, timeout=5)
+    data = {'homeworks': [], 'current_date': random_timestamp}
+    monkeypatch.setattr(
+        requests.Session,
+        'get',
+        create_mock_session_get(data, before=barrier.wait)
+    )
+    registry = subscriptions.SubscriptionRegistry()
+    for number in range(3):
+        registry.add(f'token-{number}', str(number), random_timestamp - 1000)
+
+    asyncio.run(poller.poll_due_async(
+        outbox,
+        poller.create_queue(registry),
+        storage.StateStore(':memory:'),
+        concurrency=3
+    ))
+
+    assert not len(outbox), (
+        'Убедитесь, что запросы подписок выполняются одновременно.'
+    )
+    assert all(
+        subscription.timestamp == random_timestamp
+        for subscription in registry
+    )
+
+
+def test_poll_due_async_isolates_failures(monkeypatch, random_timestamp,
+                                          outbox):
+    import asyncio
+    import threading
+
+    import poller
+    import storage
+    import subscriptions
+
+    data = {'homeworks': [], 'current_date': random_timestamp}
+    monkeypatch.setattr(
+        requests.Session, 'get', create_mock_session_get(data)
+    )
+    loop_thread = threading.get_ident()
+    schedule_threads = []
+    schedule_next_poll = poller.schedule_next_poll
+
+    def schedule_or_fail(subscription, store):
+        schedule_threads.append(threading.get_ident())
+        if subscription.token == 'token-0':
+            raise RuntimeError('database is locked')
+        schedule_next_poll(subscription, store)
+
+    monkeypatch.setattr(poller, 'schedule_next_poll', schedule_or_fail)
+    registry = subscriptions.SubscriptionRegistry()
+    for number in range(3):
+        registry.add(f'token-{number}', str(number), random_timestamp - 1000)
+    queue = poller.create_queue(registry)
+
+    asyncio.run(poller.poll_due_async(
+        outbox, queue, storage.StateStore(':memory:'), concurrency=3
+    ))
+
+    assert len(queue) == 3, (
+        'Убедитесь, что ошибка одной подписки не мешает вернуть в очередь '
+        'остальные.'
+    )
+    assert loop_thread not in schedule_threads, (
+        'Убедитесь, что работа с базой идёт не в потоке цикла событий.'
+    )
+
+
+def test_poll_due_threads_overlaps_and_requeues(monkeypatch,
+                                                random_timestamp, outbox):
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+
+    import poller
+    import storage
+    import subscriptions
+
+    barrier = threading.Barrier(3, timeout=5)
+    release = threading.Event()
+
+    def before():
+        if not barrier.broken:
+            barrier.wait()
+        release.wait(5)
+
+    data = {'homeworks': [], 'current_date': random_timestamp}
+    monkeypatch.setattr(
+        requests.Session,
+        'get',
+        create_mock_session_get(data, before=before)
+    )
+    registry = subscriptions.SubscriptionRegistry()
+    for number in range(3):
+        registry.add(f'token-{number}', str(number), random_timestamp - 1000)
+    queue = poller.create_queue(registry)
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        poller.poll_due_threads(
+            outbox, queue, storage.StateStore(':memory:'), executor,
+            threading.BoundedSemaphore(3), timeout=0.1
+        )
+        assert not len(queue), (
+            'Убедитесь, что подписка не возвращается в очередь, '
+            'пока её опрос не завершён.'
+        )
+        release.set()
+    assert len(queue) == 3
+    assert all(
+        subscription.timestamp == random_timestamp
+        for subscription in registry
+    )
+
+
+def test_restart_restores_cursor_and_skips_notified(monkeypatch, tmp_path,
+                                                    outbox):
+    import time
+
+    import cursors
+    import poller
+    import storage
+    import subscriptions
+
+    current_date = int(time.time()) - 3600
+    data = {
+        'homeworks': [
+            {'id': 1, 'homework_name': 'hw123', 'status': 'approved'}
+        ],
+        'current_date': current_date
+    }
+    calls = []
+    monkeypatch.setattr(
+        requests.Session, 'get', create_mock_session_get(data, calls)
+    )
+    path = str(tmp_path / 'state.sqlite3')
+    for _ in range(2):
+        store = storage.StateStore(path)
+        registry = subscriptions.SubscriptionRegistry()
+        registry.add('token-1', '111', current_date - 600)
+        poller.restore_cursors(registry, store)
+        poller.poll_all(outbox, registry, store)
+        outbox.drain()
+        store.close()
+
+    assert calls[1]['params']['from_date'] == (
+        current_date - cursors.CURSOR_OVERLAP
+    ), 'Убедитесь, что после перезапуска опрос продолжается с курсора.'
+    assert len(outbox.bot.sent) == 1, (
+        'Убедитесь, что после перезапуска статус не отправляется повторно.'
+    )
+
+
+def test_all_new_statuses_sent_in_one_message(monkeypatch, random_timestamp,
+                                              outbox):
+    import poller
+    import storage
+    import subscriptions
+
+    data = {
+        'homeworks': [
+            {'id': 1, 'homework_name': 'hw1', 'status': 'approved'},
+            {'id': 2, 'homework_name': 'hw2', 'status': 'rejected'},
+            {'id': 3, 'homework_name': 'hw3', 'status': 'reviewing'},
+        ],
+        'current_date': random_timestamp
+    }
+    monkeypatch.setattr(
+        requests.Session, 'get', create_mock_session_get(data)
+    )
+    store = storage.StateStore(':memory:')
+    store.save_status('token-1', '3', 'reviewing')
+    registry = subscriptions.SubscriptionRegistry()
+    registry.add('token-1', '111', 1)
+
+    poller.poll_all(outbox, registry, store)
+    outbox.drain()
+    sent = [text for _, text in outbox.bot.sent]
+
+    assert len(sent) == 1, (
+        'Убедитесь, что статусы за цикл отправляются одним сообщением.'
+    )
+    assert '"hw1"' in sent[0] and '"hw2"' in sent[0]
+    assert '"hw3"' not in sent[0], (
+        'Убедитесь, что уже отправленный статус не повторяется.'
+    )
+    assert store.load_statuses('token-1') == {
+        '1': 'approved', '2': 'rejected', '3': 'reviewing'
+    }
+
+
+def test_repeated_failure_is_reported_once(monkeypatch, outbox):
+    import poller
+    import storage
+    import subscriptions
+
+    statuses = [HTTPStatus.UNAUTHORIZED] * 3 + [HTTPStatus.OK]
+
+    def mock_session_get(session, url, **kwargs):
+        response = utils.MockResponseGET(
+            url, http_status=statuses.pop(0), **kwargs
+        )
+        response.headers = {}
+        response.content = b'{"homeworks": [], "current_date": 1}'
+        return response
+
+    monkeypatch.setattr(requests.Session, 'get', mock_session_get)
+    registry = subscriptions.SubscriptionRegistry()
+    registry.add('token-1', '111', 1)
+    store = storage.StateStore(':memory:')
+    for _ in range(4):
+        poller.poll_all(outbox, registry, store)
+        outbox.drain()
+
+    sent = [text for _, text in outbox.bot.sent]
+    assert len(sent) == 2, (
+        'Убедитесь, что о повторяющемся сбое сообщается один раз.'
+    )
+    assert sent[0].startswith('Сбой в работе программы')
+    assert sent[1] == 'Работа программы восстановлена'
+
+
+def test_failed_delivery_is_resent_from_held_cursor(monkeypatch):
+    import time
+
+    import telegram
+
+    import outbox
+    import poller
+    import storage
+    import subscriptions
+
+    class RejectingBot(RecordingBot):
+        def send_message(self, chat_id, text):
+            if not self.sent:
+                self.sent.append(None)
+                raise telegram.error.BadRequest('chat not found')
+            super().send_message(chat_id, text)
+
+    cursor = int(time.time()) - 3600
+    data = {
+        'homeworks': [
+            {'id': 1, 'homework_name': 'hw1', 'status': 'approved'}
+        ],
+        'current_date': cursor + 60
+    }
+    calls = []
+    monkeypatch.setattr(
+        requests.Session, 'get', create_mock_session_get(data, calls)
+    )
+    bot = RejectingBot()
+    queue = outbox.Outbox(bot, global_rate=1000, chat_rate=1000)
+    registry = subscriptions.SubscriptionRegistry()
+    registry.add('token-1', '111', cursor)
+    store = storage.StateStore(':memory:')
+
+    for _ in range(2):
+        poller.poll_all(queue, registry, store)
+        queue.drain()
+        data['current_date'] += 600
+
+    from_dates = [call['params']['from_date'] for call in calls]
+    assert from_dates[0] == from_dates[1], (
+        'Убедитесь, что курсор не сдвигается, пока уведомление не доставлено.'
+    )
+    assert len(bot.sent) == 2 and '"hw1"' in bot.sent[1][1], (
+        'Убедитесь, что недоставленное уведомление отправляется повторно.'
+    )
+    assert store.load_statuses('token-1') == {'1': 'approved'}
+    assert registry.get('token-1').timestamp == cursor + 660
@@ -0,0 +1,70 @@
+import pytest
+
+
+def test_status_enum_matches_verdicts():
+    import homework
+    import records
+
+    assert {status.value for status in records.Status} == set(
+        homework.HOMEWORK_VERDICTS
+    )
+
+
+def test_records_share_status_members():
+    import records
+
+    table = records.StatusTable()
+    table.load('token-1', [
+        ('1', ''.join(['appr', 'oved'])), ('2', 'approved')
+    ])
+    assert table.get('token-1') == {
+        '1': records.Status.APPROVED, '2': records.Status.APPROVED
+    }
+    assert table.get('token-1')['1'] is records.Status.APPROVED
+    with pytest.raises(ValueError):
+        table.set('token-1', '3', 'unknown')
+
+
+def test_table_updates_only_loaded_tokens():
+    import records
+
+    table = records.StatusTable()
+    table.set('token-1', '1', 'approved')
+    assert table.get('token-1') is None
+    table.load('token-1', [('1', 'reviewing')])
+    table.set('token-1', '1', 'approved')
+    assert table.get('token-1') == {'1': records.Status.APPROVED}
+    assert len(table) == 1
+
+
+def test_store_serves_statuses_from_memory():
+    import storage
+
+    store = storage.StateStore(':memory:')
+    store.save_status('token-1', '1', 'reviewing')
+    assert store.load_statuses('token-1') == {'1': 'reviewing'}
+    store.save_status('token-1', '1', 'approved')
+    store.save_status('token-1', '2', 'rejected')
+    assert store.load_statuses('token-1') == {
+        '1': 'approved', '2': 'rejected'
+    }
+    store.forget_statuses('token-1')
+    assert store.load_statuses('token-1') == {
+        '1': 'approved', '2': 'rejected'
+    }
+
+
+def test_store_view_is_read_only_and_live():
+    import storage
+
+    store = storage.StateStore(':memory:')
+    store.save_status('token-1', '1', 'reviewing')
+    statuses = store.load_statuses('token-1')
+    assert store.has_reviewing('token-1')
+    with pytest.raises(TypeError):
+        statuses['1'] = 'approved'
+    store.save_status('token-1', '1', 'approved')
+    assert statuses == {'1': 'approved'}, (
+        'Убедитесь, что статусы отдаются без копирования.'
+    )
+    assert not store.has_reviewing('token-1')
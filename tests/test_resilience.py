@@ -0,0 +1,101 @@
+from http import HTTPStatus
+
+import pytest
+import requests
+import utils
+
+
+@pytest.fixture
+def api_client(monkeypatch):
+    import api_client
+    import resilience
+    import response_cache
+
+    monkeypatch.setattr(
+        api_client, 'response_cache', response_cache.ResponseCache()
+    )
+    monkeypatch.setattr(
+        api_client,
+        'circuit_breaker',
+        resilience.CircuitBreaker(threshold=2, reset_timeout=60)
+    )
+    monkeypatch.setattr(api_client.time, 'sleep', lambda seconds: None)
+    return api_client
+
+
+def mock_session_get(statuses, headers=None, calls=None):
+    statuses = list(statuses)
+
+    def mocked(session, url, **kwargs):
+        if calls is not None:
+            calls.append(kwargs)
+        response = utils.MockResponseGET(
+            url, http_status=statuses.pop(0), **kwargs
+        )
+        response.headers = headers or {}
+        response.content = b'{"homeworks": [], "current_date": 1}'
+        response.json = lambda: {'homeworks': [], 'current_date': 1}
+        return response
+    return mocked
+
+
+def test_unavailable_api_is_retried(monkeypatch, api_client):
+    monkeypatch.setattr(requests.Session, 'get', mock_session_get(
+        [HTTPStatus.SERVICE_UNAVAILABLE, HTTPStatus.OK]
+    ))
+    assert api_client.fetch_homework_statuses('token', 1) == {
+        'homeworks': [], 'current_date': 1
+    }, 'Убедитесь, что ответ 503 запрашивается повторно.'
+
+
+def test_long_retry_after_opens_circuit(monkeypatch, api_client):
+    from exceptions import CircuitOpenError, HtppError
+
+    calls = []
+    monkeypatch.setattr(requests.Session, 'get', mock_session_get(
+        [HTTPStatus.TOO_MANY_REQUESTS],
+        headers={'Retry-After': '3600'},
+        calls=calls
+    ))
+    with pytest.raises(HtppError):
+        api_client.fetch_homework_statuses('token', 1)
+    with pytest.raises(CircuitOpenError):
+        api_client.fetch_homework_statuses('other-token', 1)
+    assert len(calls) == 1, (
+        'Убедитесь, что при долгом Retry-After запросы приостанавливаются.'
+    )
+
+
+def test_circuit_opens_after_failures_and_probes(monkeypatch):
+    import resilience
+    from exceptions import CircuitOpenError
+
+    now = [1000.0]
+    monkeypatch.setattr(resilience.time, 'time', lambda: now[0])
+    breaker = resilience.CircuitBreaker(threshold=2, reset_timeout=10)
+    for _ in range(2):
+        breaker.before_call()
+        breaker.record_failure()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    now[0] += 11
+    breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record_success()
+    breaker.before_call()
+
+
+def test_retry_after_formats():
+    import resilience
+
+    class Response:
+        def __init__(self, value):
+            self.headers = {'Retry-After': value} if value else {}
+
+    assert resilience.retry_after(Response('120')) == 120
+    assert resilience.retry_after(Response(None)) is None
+    assert resilience.retry_after(
+        Response('Wed, 21 Oct 2015 07:28:00 GMT')
+    ) == 0
@@ -0,0 +1,78 @@
+import pytest
+
+
+@pytest.fixture
+def scheduling():
+    import scheduling
+    return scheduling
+
+
+def test_reviewing_polls_more_often(scheduling):
+    assert scheduling.next_poll_delay(600, True, 0) == (
+        scheduling.REVIEWING_PERIOD
+    )
+
+
+def test_reviewing_period_can_be_raised(scheduling):
+    assert scheduling.next_poll_delay(
+        3600, True, 0, reviewing_period=3600
+    ) == 3600, (
+        'Убедитесь, что при приёме событий сверка работ на ревью '
+        'не учащается.'
+    )
+
+
+def test_default_period_without_jitter(scheduling):
+    assert scheduling.next_poll_delay(600, False, 60) == 600
+
+
+def test_idle_backs_off_exponentially(scheduling):
+    idle = scheduling.IDLE_PERIOD
+    assert scheduling.next_poll_delay(600, False, idle) == 1200
+    assert scheduling.next_poll_delay(600, False, 2 * idle) == 2400
+    assert scheduling.next_poll_delay(600, False, 100 * idle) == (
+        scheduling.MAX_RETRY_PERIOD
+    )
+
+
+def test_jitter_spreads_delay(scheduling):
+    delays = {
+        scheduling.next_poll_delay(600, False, 0, jitter=0.1)
+        for _ in range(20)
+    }
+    assert len(delays) > 1
+    assert all(540 <= delay <= 660 for delay in delays)
+
+
+def test_poll_queue_pops_only_due(scheduling):
+    import subscriptions
+
+    registry = subscriptions.SubscriptionRegistry()
+    queue = scheduling.PollQueue()
+    for number, next_poll in enumerate((30, 10, 20)):
+        subscription = registry.add(f'token-{number}', str(number), 1)
+        subscription.next_poll = next_poll
+        queue.push(subscription)
+
+    assert [s.token for s in queue.pop_due(20)] == ['token-1', 'token-2']
+    assert queue.next_due() == 30
+
+
+def test_poll_queue_skips_rescheduled_and_removed(scheduling):
+    import subscriptions
+
+    registry = subscriptions.SubscriptionRegistry()
+    queue = scheduling.PollQueue()
+    moved = registry.add('moved', '1', 1)
+    removed = registry.add('removed', '2', 1)
+    for subscription in (moved, removed):
+        subscription.next_poll = 10
+        queue.push(subscription)
+    moved.next_poll = 50
+    queue.push(moved)
+    registry.remove('removed')
+
+    assert queue.pop_due(20) == [], (
+        'Убедитесь, что перенесённые и удалённые подписки не опрашиваются.'
+    )
+    assert queue.pop_due(50) == [moved]
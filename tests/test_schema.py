@@ -0,0 +1,41 @@
+import pytest
+
+
+@pytest.fixture
+def homework():
+    import homework
+    return homework
+
+
+def test_valid_response_returns_record(homework):
+    record = homework.validate_response(
+        {'homeworks': [], 'current_date': 1, 'extra': None}
+    )
+    assert record.homeworks == [] and record.current_date == 1
+    assert isinstance(record, homework.validate_response.record)
+
+
+@pytest.mark.parametrize('data, error', (
+    ([], TypeError),
+    ({'current_date': 1}, KeyError),
+    ({'homeworks': {}, 'current_date': 1}, TypeError),
+    ({'homeworks': [], 'current_date': '1'}, TypeError),
+))
+def test_invalid_response_raises_typed_errors(homework, data, error):
+    with pytest.raises(error):
+        homework.validate_response(data)
+
+
+def test_homework_status_is_checked_against_verdicts(homework):
+    name, status = homework.validate_homework(
+        {'homework_name': 'hw', 'status': 'approved'}
+    )
+    assert (name, status) == ('hw', 'approved')
+    with pytest.raises(ValueError, match='unknown'):
+        homework.validate_homework({'homework_name': 'hw', 'status': 'unknown'})
+
+
+def test_loads_accepts_bytes():
+    import schema
+
+    assert schema.loads(b'{"homeworks": []}') == {'homeworks': []}
@@ -0,0 +1,186 @@
+import pytest
+
+
+@pytest.fixture
+def sharding():
+    import sharding
+    return sharding
+
+
+def test_ring_moves_few_keys_when_node_joins(sharding):
+    tokens = [f'token-{number}' for number in range(2000)]
+    before = sharding.HashRing(['a', 'b', 'c'])
+    after = sharding.HashRing(['a', 'b', 'c', 'd'])
+    moved = [
+        token for token in tokens if before.owner(token) != after.owner(token)
+    ]
+    assert all(after.owner(token) == 'd' for token in moved)
+    assert len(moved) < len(tokens) / 2
+
+
+def test_static_shards_split_tokens(sharding):
+    shards = [sharding.StaticShard(index, 3) for index in range(3)]
+    for number in range(300):
+        token = f'token-{number}'
+        assert sum(shard.owns(token) for shard in shards) == 1
+    with pytest.raises(ValueError):
+        sharding.StaticShard(3, 3)
+
+
+def test_membership_rebalances_on_join_and_leave(sharding, tmp_path):
+    path = str(tmp_path / 'shards.sqlite3')
+    tokens = [f'token-{number}' for number in range(300)]
+    first = sharding.WorkerMembership(path, 'first')
+    assert all(first.owns(token) for token in tokens)
+    second = sharding.WorkerMembership(path, 'second')
+    first.refresh()
+    assert all(first.owns(token) != second.owns(token) for token in tokens)
+    assert any(second.owns(token) for token in tokens)
+    second.leave()
+    first.refresh()
+    assert all(first.owns(token) for token in tokens)
+
+
+def test_poll_due_skips_foreign_tokens(sharding, monkeypatch):
+    import poller
+    import subscriptions
+    from storage import StateStore
+
+    registry = subscriptions.SubscriptionRegistry()
+    for number in range(20):
+        registry.add(f'token-{number}', '1')
+    queue = poller.create_queue(registry)
+    shard = sharding.StaticShard(0, 2)
+    polled = []
+    monkeypatch.setattr(
+        poller, 'poll_subscription',
+        lambda outbox, subscription, store: polled.append(subscription.token)
+    )
+    poller.poll_due(None, queue, StateStore(':memory:'), shard)
+    assert polled
+    assert all(shard.owns(token) for token in polled)
+    assert len(queue) == len(registry)
+
+
+def test_processes_share_state_db(monkeypatch, tmp_path):
+    import poller
+    import subscriptions
+    from storage import StateStore
+
+    path = str(tmp_path / 'state.sqlite3')
+    first = StateStore(path, timeout=0.1)
+    second = StateStore(path, timeout=0.1)
+    monkeypatch.setattr(
+        poller,
+        'fetch_api_answer',
+        lambda subscription: {'homeworks': [], 'current_date': 200}
+    )
+    registry = subscriptions.SubscriptionRegistry()
+    registry.add('token-1', '1', 100)
+
+    poller.poll_subscription(None, registry.get('token-1'), first)
+    second.save_cursor('token-2', 300)
+    second.commit()
+
+    assert first.load_cursor('token-2') == 300, (
+        'Убедитесь, что после опроса подписки база не заблокирована.'
+    )
+
+
+def test_owned_subscription_reloads_cursor(sharding):
+    import poller
+    import subscriptions
+    from storage import StateStore
+
+    store = StateStore(':memory:')
+    registry = subscriptions.SubscriptionRegistry()
+    subscription = registry.add('token-1', '1', 100)
+    store.save_cursor('token-1', 500)
+    queue = poller.create_queue(registry)
+
+    assert poller.pop_owned_due(queue, store, sharding.StaticShard(0, 1)) == [
+        subscription
+    ]
+    assert subscription.timestamp == 500, (
+        'Убедитесь, что курсор подписки читается из общей базы.'
+    )
+
+
+class Everything:
+    def __init__(self, worker_id):
+        self.worker_id = worker_id
+
+    def owns(self, token):
+        return True
+
+
+def test_claim_prevents_double_polling(tmp_path):
+    import poller
+    import subscriptions
+    from storage import StateStore
+
+    path = str(tmp_path / 'state.sqlite3')
+    queues = []
+    for _ in range(2):
+        registry = subscriptions.SubscriptionRegistry()
+        registry.add('token-1', '1', 100)
+        queues.append(poller.create_queue(registry))
+
+    first = poller.pop_owned_due(queues[0], StateStore(path), Everything('a'))
+    second = poller.pop_owned_due(
+        queues[1], StateStore(path), Everything('b')
+    )
+
+    assert (len(first), len(second)) == (1, 0), (
+        'Убедитесь, что токен опрашивает только захвативший его воркер.'
+    )
+
+
+def test_claim_expires_and_moves(tmp_path):
+    from storage import StateStore
+
+    path = str(tmp_path / 'state.sqlite3')
+    first = StateStore(path)
+    second = StateStore(path)
+
+    assert first.claim('token-1', 'a', ttl=-1)
+    assert second.claim('token-1', 'b')
+    assert not first.claim('token-1', 'a')
+    second.release_claims('b')
+    assert first.claim('token-1', 'a')
+
+
+def test_owning_shard_picks_up_bot_subscription(sharding, tmp_path):
+    import poller
+    import subscriptions
+    from storage import StateStore
+
+    path = str(tmp_path / 'state.sqlite3')
+    shards = [sharding.StaticShard(index, 2) for index in range(2)]
+    token = next(
+        f'token-{number}' for number in range(100)
+        if shards[1].owns(f'token-{number}')
+    )
+    commands_store = StateStore(path)
+    owner_store = StateStore(path)
+    owner = subscriptions.SubscriptionRegistry()
+    queue = poller.create_queue(owner)
+    synced = poller.restore_subscriptions(owner, owner_store)
+
+    commands_store.save_subscription(token, '1')
+    commands_store.save_cursor(token, 100)
+    commands_store.commit()
+    poller.sync_subscriptions(owner, queue, owner_store, synced)
+
+    assert owner.get(token).timestamp == 100, (
+        'Убедитесь, что шард подхватывает подписки, оформленные командами '
+        'бота в другом процессе.'
+    )
+    assert [subscription.token for subscription in poller.pop_owned_due(
+        queue, owner_store, shards[1]
+    )] == [token]
+
+    commands_store.delete_subscription(token)
+    commands_store.commit()
+    poller.sync_subscriptions(owner, queue, owner_store, synced)
+    assert token not in owner
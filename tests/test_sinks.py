@@ -0,0 +1,171 @@
+import io
+import threading
+
+import pytest
+
+
+@pytest.fixture
+def sinks():
+    import sinks
+    return sinks
+
+
+class RecordingOutbox:
+    def __init__(self):
+        self.sent = []
+
+    def put(self, chat_id, text, on_sent=None, on_dropped=None):
+        self.sent.append((chat_id, text))
+        if on_sent is not None:
+            on_sent()
+
+    def drain(self):
+        pass
+
+    def __len__(self):
+        return 0
+
+
+def test_fan_out_routes_by_scheme(sinks):
+    outbox = RecordingOutbox()
+    stream = io.StringIO()
+    fan_out = sinks.FanOut(sinks.TelegramSink(outbox), {
+        'stdout': sinks.StdoutSink(stream),
+    })
+    sent = []
+
+    fan_out.put('1', 'text', lambda: sent.append('1'))
+    fan_out.forward(['tg:-100', '-200', 'stdout', 'ftp://unknown'], 'text')
+    fan_out.drain()
+
+    assert outbox.sent == [('1', 'text'), ('-100', 'text'), ('-200', 'text')]
+    assert stream.getvalue() == 'text\n\n'
+    assert sent == ['1'], (
+        'Убедитесь, что подтверждение приходит по доставке в чат подписки.'
+    )
+
+
+def test_slow_sink_does_not_block_others(sinks):
+    release = threading.Event()
+
+    class SlowSink(sinks.Sink):
+        def send(self, destination, text):
+            release.wait()
+
+    stream = io.StringIO()
+    slow = SlowSink(maxsize=1).start()
+    fan_out = sinks.FanOut(sinks.TelegramSink(RecordingOutbox()), {
+        'https': slow,
+        'stdout': sinks.StdoutSink(stream),
+    })
+
+    for number in range(5):
+        fan_out.forward(['https://hook.example', 'stdout'], str(number))
+    fan_out.sinks['stdout'].drain()
+    release.set()
+
+    assert stream.getvalue() == '0\n\n1\n\n2\n\n3\n\n4\n\n'
+    assert len(slow) <= 1, 'Убедитесь, что очередь получателя ограничена.'
+
+
+def test_failed_send_is_logged(sinks, caplog):
+    class BrokenSink(sinks.Sink):
+        def send(self, destination, text):
+            raise ConnectionError('недоступен')
+
+    sent = []
+    sink = BrokenSink()
+    sink.put('https://hook.example', 'text', lambda: sent.append(1))
+    sink.drain()
+
+    assert not sent
+    assert 'недоступен' in caplog.text
+
+
+def test_deliver_forwards_to_destinations(sinks):
+    import poller
+    import storage
+    import subscriptions
+
+    outbox = RecordingOutbox()
+    stream = io.StringIO()
+    fan_out = sinks.FanOut(sinks.TelegramSink(outbox), {
+        'stdout': sinks.StdoutSink(stream),
+    })
+    subscription = subscriptions.Subscription(
+        'token-1', '111', destinations=['stdout']
+    )
+    store = storage.StateStore(':memory:')
+
+    poller.deliver(fan_out, subscription, store, 'text',
+                   [{'id': 1, 'status': 'approved'}])
+    fan_out.drain()
+
+    assert outbox.sent == [('111', 'text')]
+    assert stream.getvalue() == 'text\n\n'
+    assert store.load_statuses('token-1') == {'1': 'approved'}
+
+
+def test_sink_requires_send(sinks):
+    with pytest.raises(TypeError):
+        sinks.Sink()
+
+
+def test_forwarded_text_is_not_escaped(sinks, monkeypatch):
+    import poller
+    import storage
+    import subscriptions
+    import templates
+
+    monkeypatch.setattr(poller, 'NOTIFICATION_MARKUP', templates.MARKDOWN_V2)
+    outbox = RecordingOutbox()
+    stream = io.StringIO()
+    fan_out = sinks.FanOut(sinks.TelegramSink(outbox), {
+        'stdout': sinks.StdoutSink(stream),
+    })
+    subscription = subscriptions.Subscription(
+        'token-1', '111', destinations=['stdout', 'tg:-100']
+    )
+    store = storage.StateStore(':memory:')
+    homeworks = [{'id': 1, 'homework_name': 'hw_1.py', 'status': 'approved'}]
+
+    message, plain = poller.render_notification(homeworks)
+    poller.deliver(fan_out, subscription, store, message, homeworks,
+                   plain=plain)
+    fan_out.drain()
+
+    assert [text for _, text in outbox.sent] == [message, message]
+    assert 'hw\\_1\\.py' in message
+    assert stream.getvalue() == plain + '\n\n' and '"hw_1.py"' in plain, (
+        'Убедитесь, что адреса вне Telegram получают текст без экранирования.'
+    )
+
+
+def test_copies_wait_for_chat_delivery(sinks):
+    import poller
+    import storage
+    import subscriptions
+
+    class DroppingOutbox(RecordingOutbox):
+        def put(self, chat_id, text, on_sent=None, on_dropped=None):
+            if chat_id == '111':
+                on_dropped()
+                return
+            super().put(chat_id, text, on_sent, on_dropped)
+
+    outbox = DroppingOutbox()
+    stream = io.StringIO()
+    fan_out = sinks.FanOut(sinks.TelegramSink(outbox), {
+        'stdout': sinks.StdoutSink(stream),
+    })
+    subscription = subscriptions.Subscription(
+        'token-1', '111', destinations=['stdout', '-100']
+    )
+
+    poller.deliver(fan_out, subscription, storage.StateStore(':memory:'),
+                   'text', [{'id': 1, 'status': 'approved'}])
+    fan_out.drain()
+
+    assert outbox.sent == [] and stream.getvalue() == '', (
+        'Убедитесь, что копии уходят только после доставки в чат подписки.'
+    )
@@ -0,0 +1,23 @@
+import os
+import subprocess
+import sys
+
+
+def test_homework_import_skips_heavy_clients():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    completed = subprocess.run(
+        [
+            sys.executable, '-c',
+            'import sys, homework; '
+            'print(sorted({"telegram", "requests", "dotenv"} & '
+            'set(sys.modules)))'
+        ],
+        cwd=root,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    assert completed.stdout.strip() == '[]', (
+        'Убедитесь, что telegram, requests и dotenv импортируются '
+        'при первом использовании, а не при импорте homework.'
+    )
@@ -0,0 +1,57 @@
+import pytest
+
+
+@pytest.fixture
+def homework():
+    import homework
+    return homework
+
+
+HOMEWORK = {
+    'homework_name': 'user__hw_1.zip',
+    'status': 'rejected',
+    'reviewer_comment': 'Поправьте отступы (PEP 8).',
+}
+
+
+def test_default_text_is_unchanged(homework):
+    assert homework.parse_status(HOMEWORK) == homework.STATUS_CHANGED.format(
+        homework_name='user__hw_1.zip',
+        verdict=homework.HOMEWORK_VERDICTS['rejected']
+    ), 'Убедитесь, что текст по умолчанию не изменился.'
+
+
+def test_markdown_escapes_name_comment_and_fragments(homework):
+    text = homework.render_status(HOMEWORK, markup='MarkdownV2',
+                                  comments=True)
+
+    assert text == (
+        'Изменился статус проверки работы "user\\_\\_hw\\_1\\.zip"\\. '
+        'Комментарий ревьюера: «Поправьте отступы \\(PEP 8\\)\\.»\\. '
+        'Работа проверена: у ревьюера есть замечания\\.'
+    )
+
+
+def test_html_and_english(homework):
+    text = homework.render_status(
+        dict(HOMEWORK, homework_name='<b>hw</b>'), locale='en', markup='HTML'
+    )
+
+    assert text == ('Homework "&lt;b&gt;hw&lt;/b&gt;" review status changed. '
+                    'The reviewer has comments.')
+
+
+def test_unknown_locale_and_markup(homework):
+    with pytest.raises(KeyError):
+        homework.render_status(HOMEWORK, locale='de')
+    with pytest.raises(KeyError):
+        homework.render_status(HOMEWORK, markup='Markdown')
+
+
+def test_template_without_field():
+    import templates
+
+    with pytest.raises(ValueError):
+        templates.Templates({'ru': templates.Locale(
+            'Статус {homework_name}', {'approved': 'ok'}, '{comment}'
+        )})